@@ -0,0 +1,206 @@
+"""asyncio front end for the frame loop: input, simulation and display tasks.
+
+Runs on uasyncio on the Pico and on asyncio on the host emulator:
+
+    AsyncRunner(picounicorn, graphics, fb, effects, buttons).run()
+
+Three tasks share one Runner's state:
+
+- input polls the buttons every poll_ms, independent of the frame rate
+- simulate plays the current effect, which awaits runner.tick() after drawing
+  each frame; tick() hands the frame over and sleeps until the scheduler says
+  the next step is due, reusing one awaitable so no frame allocates
+- display pushes each finished frame to the panel, and pushes the current
+  one again after a brightness change, so the knob works while paused
+
+Generator effects from the playlists are driven as coroutines, one tick per
+yield. An effect can also be written natively as a coroutine:
+
+    async def sweep(tick):
+        for x in range(w):
+            fb.set_pixel(x, 3, 255, 255, 255)
+            await tick()
+
+    effects = [("Sweep", coroutine_effect(sweep), 30)]
+
+Other work, such as a network control task, can be added with
+asyncio.create_task before run() and interleaves with the frame loop.
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+import time
+
+from runner import Runner
+
+if hasattr(asyncio, "sleep_ms"):
+    sleep_ms = asyncio.sleep_ms
+else:
+    def sleep_ms(ms):
+        return asyncio.sleep(ms / 1000)
+
+
+class coroutine_effect:
+    """Playlist entry for an effect written as `async def effect(tick)`"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+class EffectChanged(Exception):
+    """Raised inside an effect's tick() when another effect was selected"""
+
+
+class Tick:
+    """runner.tick: one awaitable per runner, reused for every frame.
+
+    Calling it hands the drawn frame over; awaiting the result sleeps until
+    the next step is due. On uasyncio it is its own iterator and sleeps
+    through sleep_ms's reusable generator, so a frame allocates no coroutine.
+    asyncio awaits it through __await__ instead.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.wait = False
+        self.ms = -1
+        self.done = StopIteration()
+
+    def __call__(self):
+        self.wait = self.runner.handover()
+        self.ms = self.runner.scheduler.remaining_ms()
+        return self
+
+    def due(self):
+        """Await the next step without handing a frame over"""
+        self.wait = True
+        self.ms = self.runner.scheduler.remaining_ms()
+        return self
+
+    def _sleep(self):
+        # Milliseconds to sleep next, or -1 when the await is over
+        if not self.wait:
+            return -1
+        ms = self.ms
+        if ms < 0:
+            ms = self.runner.next_wait()
+            if ms < 0:
+                self.wait = False
+                return -1
+        self.ms = -1
+        return ms
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        ms = self._sleep()
+        if ms >= 0:
+            # Queues this task to wake in ms and yields to the loop
+            return next(sleep_ms(ms))
+        self.done.__traceback__ = None
+        raise self.done
+
+    def __await__(self):
+        ms = self._sleep()
+        while ms >= 0:
+            yield from sleep_ms(ms).__await__()
+            ms = self._sleep()
+
+
+class AsyncRunner(Runner):
+    def __init__(self, picounicorn, graphics, fb, effects, buttons=None, poll_ms=10):
+        Runner.__init__(self, picounicorn, graphics, fb, effects, buttons)
+        self.poll_ms = poll_ms
+        self.tick = Tick(self)
+        # Set by the simulate task, cleared by display; a flag rather than
+        # an Event, whose wait() would be a new coroutine every frame
+        self.ready = False
+        self.effect = None
+        self._pending = 0
+        self._switch = False
+        self._started = None
+
+    def start(self, effect):
+        # The simulate task notices at the next tick and starts it there
+        self.effect = effect
+        self._switch = True
+
+    def set_brightness(self, level):
+        Runner.set_brightness(self, level)
+        # No frames come while paused; show the change anyway
+        self.ready = True
+
+    def next_wait(self):
+        """After a sleep: -1 if a step is due, otherwise ms to sleep again"""
+        if self._switch:
+            raise EffectChanged()
+        if self.ready:
+            # Don't draw over a frame display hasn't shown yet
+            return 1
+        steps = self.scheduler.due()
+        if self.paused:
+            # Time passes but the effect stands still
+            return self.poll_ms
+        if not steps:
+            return self.scheduler.remaining_ms()
+        self._pending = steps
+        if self.telemetry:
+            self._started = time.ticks_us()
+        return -1
+
+    def handover(self):
+        """An effect drew a frame; True if it should wait for the next step"""
+        self.frame += 1
+        self._pending -= 1
+        if self._pending > 0 and not self._switch:
+            # Catching up after an overrun: simulate without rendering
+            return False
+        if self.telemetry and self._started is not None:
+            self.telemetry.compute(time.ticks_diff(time.ticks_us(), self._started))
+            self._started = None
+        self.ready = True
+        return True
+
+    async def play(self, effect):
+        await self.tick.due()
+        if isinstance(effect, coroutine_effect):
+            await effect.fn(self.tick)
+        else:
+            for _ in effect():
+                await self.tick()
+
+    async def simulate(self):
+        if self.effect is None:
+            self.select(self.index)
+        while True:
+            self._switch = False
+            try:
+                await self.play(self.effect)
+                self.next()
+            except EffectChanged:
+                pass
+
+    async def input(self):
+        while True:
+            self.poll()
+            await sleep_ms(self.poll_ms)
+
+    async def display(self):
+        while True:
+            if self.ready:
+                self.ready = False
+                self.show()
+            # Polling keeps the hand-off allocation-free; a frame waits at
+            # most a millisecond to be shown
+            await sleep_ms(1)
+
+    async def main(self):
+        # gather() raises the first failure of any task, so an exception in
+        # a button action or in show() stops the runner instead of leaving
+        # the other tasks running without it
+        await asyncio.gather(self.input(), self.display(), self.simulate())
+
+    def run(self):
+        asyncio.run(self.main())
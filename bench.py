@@ -0,0 +1,102 @@
+"""Frame-time benchmark for the demo effects, run on the host emulator.
+
+    python bench.py                       # every effect in every script
+    python bench.py -n 200 grok_demo      # one script, 200 frames per effect
+    python bench.py -e subpixel_shimmer   # only effects with this name
+
+For each effect it reports frames/sec, the per-frame p50/p99 times, how
+many create_pen/pixel calls were made per frame and how many pixels the
+framebuffer actually had to push per frame.
+"""
+import argparse
+import importlib
+import random
+
+import emulator
+
+SCRIPTS = ("claude_demo", "dithering_claude", "grok_demo")
+
+
+def effects_of(module):
+    """(name, func) for every effect a demo script offers"""
+    for attr in ("animations", "effects", "modes"):
+        if hasattr(module, attr):
+            return [(func.__name__, func) for _, func, _ in getattr(module, attr)]
+    return []
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def run_effect(module, func, frames, seed=0):
+    """Run one effect for a fixed number of frames and return its stats"""
+    unicorn = module.picounicorn
+    graphics = module.graphics
+    random.seed(seed)
+    graphics.reset_counters()
+    module.fb.total_changed = 0
+    unicorn.updates = 0
+    unicorn.frame_limit = frames
+    unicorn.mark()
+    frames = func()
+    try:
+        while True:
+            try:
+                next(frames)
+            except StopIteration:
+                frames = func()
+                continue
+            module.fb.push(graphics)
+            unicorn.update(graphics)
+    except emulator.FrameLimit:
+        pass
+    finally:
+        unicorn.frame_limit = None
+
+    times = unicorn.frame_times
+    total = sum(times)
+    calls = graphics.calls
+    return {
+        "frames": len(times),
+        "fps": len(times) / total if total else 0.0,
+        "p50": percentile(times, 50) * 1000,
+        "p99": percentile(times, 99) * 1000,
+        "pens": (calls["create_pen"] + calls["create_pen_hsv"]) / len(times),
+        "pixels": calls["pixel"] / len(times),
+        "dirty": module.fb.total_changed / len(times),
+    }
+
+
+def report(script, name, stats):
+    print("%-16s %-26s %6d %9.1f %8.3f %8.3f %8.1f %8.1f %8.1f" % (
+        script, name, stats["frames"], stats["fps"], stats["p50"], stats["p99"],
+        stats["pens"], stats["pixels"], stats["dirty"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("-n", "--frames", type=int, default=100)
+    parser.add_argument("-e", "--effect", action="append")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    emulator.install()
+    print("%-16s %-26s %6s %9s %8s %8s %8s %8s %8s" % (
+        "script", "effect", "frames", "fps", "p50 ms", "p99 ms", "pens/f", "pixels/f",
+        "dirty/f"))
+    for script in args.scripts:
+        module = importlib.import_module(script)
+        for name, func in effects_of(module):
+            if args.effect and name not in args.effect:
+                continue
+            report(script, name, run_effect(module, func, args.frames, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 from picounicorn import PicoUnicorn
 from picographics import PicoGraphics, DISPLAY_UNICORN_PACK
-import time
 import random
 import math
+from array import array
+from framebuffer import FrameBuffer, GAMMA
+from particles import ParticleSystem, SPIRAL, fire, electric, spiral
+from decay import fade, fade_rgb, linear, exponential, per_channel
+from sprites import Sprite
+from aiorunner import AsyncRunner
 
 # Initialize both PicoUnicorn and PicoGraphics
 picounicorn = PicoUnicorn()
@@ -12,78 +17,64 @@ graphics = PicoGraphics(display=DISPLAY_UNICORN_PACK)
 w = picounicorn.get_width()
 h = picounicorn.get_height()
 
-# Create base colors
-BLACK = graphics.create_pen(0, 0, 0)
+# Effects draw one frame into the framebuffer and yield; the runner shows it
+fb = FrameBuffer(w, h)
+fb.set_brightness(1.0, GAMMA)
 
 # PARTICLE SYSTEM (Enhanced version with that color scheme you liked!)
-class Particle:
-    def __init__(self):
-        self.reset()
-        
-    def reset(self):
-        self.x = random.uniform(0, w)
-        self.y = random.uniform(0, h)
-        self.vx = random.uniform(-0.5, 0.5)
-        self.vy = random.uniform(-0.5, 0.5)
-        self.life = 1.0
-        self.decay = random.uniform(0.01, 0.03)
-        self.color_type = random.randint(0, 3)  # Different color schemes
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.life -= self.decay
-        
-        # Wrap around edges
-        if self.x < 0: self.x = w
-        if self.x > w: self.x = 0
-        if self.y < 0: self.y = h
-        if self.y > h: self.y = 0
-        
-        if self.life <= 0:
-            self.reset()
-    
-    def get_color(self):
-        brightness = int(255 * self.life)
-        if self.color_type == 0:
-            # Orange/yellow fire colors
-            return (brightness, brightness // 2, brightness // 4)
-        elif self.color_type == 1:
-            # Cyan/blue electric
-            return (brightness // 4, brightness // 2, brightness)
-        elif self.color_type == 2:
-            # Purple/magenta
-            return (brightness, brightness // 4, brightness // 2)
-        else:
-            # Green matrix style
-            return (0, brightness, brightness // 4)
+# Particles live in flat arrays, see particles.py
+particles = ParticleSystem(64, w, h)
 
-# Initialize particle system
-particles = []
+# Decay tables for the trail effects, see decay.py
+TRAIL_FADE = linear(15)
+RAIN_FADE = per_channel(exponential(0.3), exponential(0.6), exponential(0.4))
 
 # RETRO GAME ANIMATIONS
 
+# Sprites are compiled once, see sprites.py
+# Simple invader shape (5x3), two animation frames
+INVADER = Sprite([
+    [[0,1,0,1,0],
+     [1,1,1,1,1],
+     [1,0,1,0,1]],
+    [[0,1,0,1,0],
+     [1,1,1,1,1],
+     [0,1,0,1,0]],
+], (0, 255, 0))
+
+# Pacman (simple circle), mouth open then closed
+PACMAN = Sprite([
+    [[0,1,0],
+     [1,1,0],
+     [0,1,0]],
+    [[0,1,0],
+     [1,1,1],
+     [0,1,0]],
+], (255, 255, 0))
+
+# Simple ghost shape; its colour is chosen per frame
+GHOST = Sprite([[[1,1,1], [1,1,1], [1,1,1]]], (255, 0, 0))
+GHOST_COLORS = ((255, 0, 0), (255, 192, 203), (0, 255, 255), (255, 165, 0))
+
+# Tetris pieces (simplified), each with its colour
+TETROMINOES = [
+    Sprite([[[1,1,1,1]]], (0, 255, 255)),            # I piece, cyan
+    Sprite([[[1,1],[1,1]]], (255, 255, 0)),          # O piece, yellow
+    Sprite([[[1,1,1],[0,1,0]]], (128, 0, 128)),      # T piece, purple
+    Sprite([[[1,1,0],[0,1,1]]], (255, 0, 0)),        # Z piece, red
+]
+
+# Galaga enemies and the player's ship
+SHIP = Sprite([[[1,1,1]]], (0, 255, 0))
+
 # 1. SPACE INVADERS STYLE
 def space_invaders():
     """Classic space invaders marching animation"""
-    # Simple invader shape (5x3)
-    invader1 = [
-        [0,1,0,1,0],
-        [1,1,1,1,1],
-        [1,0,1,0,1]
-    ]
-    invader2 = [
-        [0,1,0,1,0],
-        [1,1,1,1,1],
-        [0,1,0,1,0]
-    ]
-    
     for frame in range(100):
-        graphics.set_pen(BLACK)
-        graphics.clear()
+        fb.clear()
         
         # Animate between two frames
-        current_invader = invader1 if (frame // 10) % 2 == 0 else invader2
+        current_invader = (frame // 10) % 2
         
         # Move invaders
         offset_x = (frame // 2) % (w + 5) - 5
@@ -91,27 +82,15 @@ def space_invaders():
         # Draw multiple invaders
         for row in range(2):
             for col in range(3):
-                x_pos = offset_x + col * 6
-                y_pos = row * 4 + 1
-                
-                # Draw invader
-                for y, row_data in enumerate(current_invader):
-                    for x, pixel in enumerate(row_data):
-                        if pixel and 0 <= x_pos + x < w and 0 <= y_pos + y < h:
-                            # Classic green color
-                            color = graphics.create_pen(0, 255, 0)
-                            graphics.set_pen(color)
-                            graphics.pixel(x_pos + x, y_pos + y)
-        
-        picounicorn.update(graphics)
-        time.sleep(0.05)
+                INVADER.blit(fb, offset_x + col * 6, row * 4 + 1, current_invader)
+        
+        yield
 
 # 2. PACMAN CHASE
 def pacman_chase():
     """Pacman chasing dots with ghost"""
     for frame in range(200):
-        graphics.set_pen(BLACK)
-        graphics.clear()
+        fb.clear()
         
         # Pacman position
         pac_x = (frame * 0.2) % (w + 4) - 2
@@ -120,166 +99,145 @@ def pacman_chase():
         # Draw dots
         for x in range(0, w, 2):
             if x > pac_x + 2:  # Only draw dots Pacman hasn't eaten
-                dot_color = graphics.create_pen(255, 255, 0)
-                graphics.set_pen(dot_color)
-                graphics.pixel(x, pac_y)
+                fb.set_pixel(x, pac_y, 255, 255, 0)
         
         # Draw Pacman (simple circle with mouth)
-        pac_color = graphics.create_pen(255, 255, 0)
-        graphics.set_pen(pac_color)
-        
-        # Pacman body
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if abs(dx) + abs(dy) <= 1:  # Simple circle shape
-                    px = int(pac_x + dx)
-                    py = pac_y + dy
-                    if 0 <= px < w and 0 <= py < h:
-                        # Don't draw mouth area
-                        if not (dx > 0 and dy == 0 and (frame // 5) % 2 == 0):
-                            graphics.pixel(px, py)
+        
+        # Pacman body, mouth open every other 5 frames
+        PACMAN.blit(fb, int(pac_x) - 1, pac_y - 1, (frame // 5) % 2)
         
         # Draw ghost following
         ghost_x = int(pac_x - 5)
         if ghost_x >= 0:
             # Ghost colors cycle
-            ghost_colors = [(255, 0, 0), (255, 192, 203), (0, 255, 255), (255, 165, 0)]
-            r, g, b = ghost_colors[(frame // 20) % 4]
-            ghost_color = graphics.create_pen(r, g, b)
-            graphics.set_pen(ghost_color)
-            
-            # Simple ghost shape
-            for y in range(3):
-                for x in range(3):
-                    if ghost_x + x < w:
-                        graphics.pixel(ghost_x + x, pac_y - 1 + y)
-        
-        picounicorn.update(graphics)
-        time.sleep(0.03)
+            GHOST.blit(fb, ghost_x, pac_y - 1, color=GHOST_COLORS[(frame // 20) % 4])
+        
+        yield
 
 # 3. TETRIS FALLING BLOCKS
 def tetris_blocks():
-    """Falling tetris pieces"""
-    # Tetris pieces (simplified)
-    pieces = [
-        [[1,1,1,1]],  # I piece
-        [[1,1],[1,1]],  # O piece
-        [[1,1,1],[0,1,0]],  # T piece
-        [[1,1,0],[0,1,1]],  # Z piece
-    ]
+    """Falling tetris pieces, stacking and clearing lines"""
+    # Locked cells as one bitmask per row, and already drawn
+    stack = [0] * h
+    layer = FrameBuffer(w, h)
+    full = (1 << w) - 1
     
-    # Colors for pieces
-    piece_colors = [
-        (0, 255, 255),    # Cyan
-        (255, 255, 0),    # Yellow
-        (128, 0, 128),    # Purple
-        (255, 0, 0),      # Red
-    ]
+    def fits(masks, x, y):
+        for row, mask in enumerate(masks):
+            if y + row >= h or stack[y + row] & (mask << x):
+                return False
+        return True
     
-    # Fallen pieces grid
-    grid = [[0 for _ in range(w)] for _ in range(h)]
+    def landing(masks, x):
+        y = 0
+        while fits(masks, x, y + 1):
+            y += 1
+        return y
     
     for _ in range(50):
-        # New piece
-        piece_type = random.randint(0, len(pieces) - 1)
-        piece = pieces[piece_type]
-        piece_color = piece_colors[piece_type]
-        piece_x = random.randint(0, w - len(piece[0]))
+        # New piece, dropped in whichever column lets it fall furthest
+        sprite = TETROMINOES[random.randint(0, len(TETROMINOES) - 1)]
+        masks = sprite.masks[0]
+        # (from a random column, so ties don't all go left)
+        columns = w - sprite.width + 1
+        start = random.randint(0, columns - 1)
+        piece_x = start
+        deepest = -1
+        for k in range(columns):
+            x = (start + k) % columns
+            y = landing(masks, x)
+            if y > deepest:
+                piece_x = x
+                deepest = y
         piece_y = 0
         
+        if not fits(masks, piece_x, piece_y):
+            # Topped out: start again with an empty well
+            stack = [0] * h
+            layer.clear()
+        
         # Fall animation
-        while piece_y < h - len(piece):
-            graphics.set_pen(BLACK)
-            graphics.clear()
-            
-            # Draw fallen pieces
-            for y in range(h):
-                for x in range(w):
-                    if grid[y][x]:
-                        color = graphics.create_pen(*grid[y][x])
-                        graphics.set_pen(color)
-                        graphics.pixel(x, y)
+        while True:
+            fb.buf[:] = layer.buf
+            sprite.blit(fb, piece_x, piece_y)
             
-            # Draw falling piece
-            color = graphics.create_pen(*piece_color)
-            graphics.set_pen(color)
-            for y, row in enumerate(piece):
-                for x, pixel in enumerate(row):
-                    if pixel and piece_x + x < w:
-                        graphics.pixel(piece_x + x, piece_y + y)
+            yield
             
-            picounicorn.update(graphics)
-            time.sleep(0.1)
-            
-            # Check collision
-            can_fall = True
-            for y, row in enumerate(piece):
-                for x, pixel in enumerate(row):
-                    if pixel:
-                        if piece_y + y + 1 >= h or grid[piece_y + y + 1][piece_x + x]:
-                            can_fall = False
-                            break
-            
-            if can_fall:
-                piece_y += 1
-            else:
-                # Lock piece in place
-                for y, row in enumerate(piece):
-                    for x, pixel in enumerate(row):
-                        if pixel and piece_y + y < h and piece_x + x < w:
-                            grid[piece_y + y][piece_x + x] = piece_color
+            if not fits(masks, piece_x, piece_y + 1):
                 break
+            piece_y += 1
+        
+        # Lock piece in place
+        for row, mask in enumerate(masks):
+            stack[piece_y + row] |= mask << piece_x
+        sprite.blit(layer, piece_x, piece_y)
+        
+        # Clear full lines, moving everything above them down
+        stride = w * 3
+        for y in range(h):
+            if stack[y] == full:
+                del stack[y]
+                stack.insert(0, 0)
+                layer.buf[stride:(y + 1) * stride] = layer.buf[0:y * stride]
+                layer.buf[0:stride] = bytes(stride)
 
 # 4. SNAKE GAME
 def snake_game():
     """Classic snake moving around"""
-    snake = [(w//2, h//2)]
-    direction = (1, 0)
-    food = (random.randint(0, w-1), random.randint(0, h-1))
+    # The body is a ring of cells, head first, so moving allocates nothing
+    cells = w * h
+    body_x = bytearray(cells)
+    body_y = bytearray(cells)
+    head = 0
+    length = 1
+    body_x[0] = w // 2
+    body_y[0] = h // 2
+    dx = 1
+    dy = 0
+    food_x = random.randint(0, w-1)
+    food_y = random.randint(0, h-1)
     
     for frame in range(200):
         # Auto-steer snake towards food (AI snake!)
         if frame % 10 == 0:
-            head_x, head_y = snake[0]
-            food_x, food_y = food
+            head_x = body_x[head]
+            head_y = body_y[head]
             
             if abs(food_x - head_x) > abs(food_y - head_y):
-                direction = (1 if food_x > head_x else -1, 0)
+                dx = 1 if food_x > head_x else -1
+                dy = 0
             else:
-                direction = (0, 1 if food_y > head_y else -1)
+                dx = 0
+                dy = 1 if food_y > head_y else -1
         
-        # Move snake
+        # Move snake: the new head takes the slot before the old one
         if frame % 5 == 0:
-            head_x, head_y = snake[0]
-            new_head = ((head_x + direction[0]) % w, (head_y + direction[1]) % h)
-            
-            snake.insert(0, new_head)
+            head_x = (body_x[head] + dx) % w
+            head_y = (body_y[head] + dy) % h
+            head = (head - 1) % cells
+            body_x[head] = head_x
+            body_y[head] = head_y
             
-            # Check food collision
-            if new_head == food:
-                food = (random.randint(0, w-1), random.randint(0, h-1))
-            else:
-                snake.pop()  # Remove tail if no food eaten
+            # Check food collision; otherwise the tail slot drops off
+            if head_x == food_x and head_y == food_y:
+                length = min(length + 1, cells)
+                food_x = random.randint(0, w-1)
+                food_y = random.randint(0, h-1)
         
         # Draw
-        graphics.set_pen(BLACK)
-        graphics.clear()
+        fb.clear()
         
         # Draw snake with gradient
-        for i, (x, y) in enumerate(snake):
+        for i in range(length):
+            cell = (head + i) % cells
             brightness = 255 - (i * 20)
-            color = graphics.create_pen(0, max(50, brightness), 0)
-            graphics.set_pen(color)
-            graphics.pixel(x, y)
+            fb.set_pixel(body_x[cell], body_y[cell], 0, max(50, brightness), 0)
         
         # Draw food (blinking)
         if (frame // 5) % 2:
-            food_color = graphics.create_pen(255, 0, 0)
-            graphics.set_pen(food_color)
-            graphics.pixel(food[0], food[1])
+            fb.set_pixel(food_x, food_y, 255, 0, 0)
         
-        picounicorn.update(graphics)
-        time.sleep(0.03)
+        yield
 
 # 5. PONG
 def pong_game():
@@ -314,259 +272,211 @@ def pong_game():
         paddle2_y += (ball_y - paddle2_y) * 0.1
         
         # Draw
-        graphics.set_pen(BLACK)
-        graphics.clear()
+        fb.clear()
         
         # Draw paddles
-        paddle_color = graphics.create_pen(255, 255, 255)
-        graphics.set_pen(paddle_color)
-        
         for i in range(-1, 2):
-            if 0 <= int(paddle1_y) + i < h:
-                graphics.pixel(0, int(paddle1_y) + i)
-            if 0 <= int(paddle2_y) + i < h:
-                graphics.pixel(w - 1, int(paddle2_y) + i)
+            fb.set_pixel(0, int(paddle1_y) + i, 255, 255, 255)
+            fb.set_pixel(w - 1, int(paddle2_y) + i, 255, 255, 255)
         
         # Draw ball
-        ball_color = graphics.create_pen(255, 255, 255)
-        graphics.set_pen(ball_color)
-        graphics.pixel(int(ball_x), int(ball_y))
+        fb.set_pixel(int(ball_x), int(ball_y), 255, 255, 255)
         
         # Draw center line
         for y in range(0, h, 2):
-            graphics.pixel(w // 2, y)
+            fb.set_pixel(w // 2, y, 255, 255, 255)
         
-        picounicorn.update(graphics)
-        time.sleep(0.02)
+        yield
 
 # 6. ENHANCED PARTICLE TRAILS (Your favorite!)
 def enhanced_particle_trails():
     """Multiple particle systems with different behaviors"""
-    global particles
-    
     # Initialize different particle types
-    particles = []
-    # Fire particles
-    for _ in range(8):
-        p = Particle()
-        p.color_type = 0  # Orange/fire
-        p.vy = random.uniform(-0.8, -0.3)  # Upward
-        p.vx = random.uniform(-0.2, 0.2)
-        p.y = h - 1
-        particles.append(p)
-    
-    # Electric particles
-    for _ in range(6):
-        p = Particle()
-        p.color_type = 1  # Cyan/electric
-        p.vx = random.uniform(-1, 1)
-        p.vy = 0
-        particles.append(p)
+    particles.clear()
+    particles.emit(fire(h), 8)
+    particles.emit(electric(), 6)
+    particles.emit(spiral(), 6)
     
-    # Spiral particles
-    for _ in range(6):
-        p = Particle()
-        p.color_type = 2  # Purple
-        particles.append(p)
-    
-    trail_buffer = [[0 for _ in range(w)] for _ in range(h)]
+    trail_buffer = bytearray(w * h)
     
     for frame in range(200):
         # Fade trail buffer
-        for y in range(h):
-            for x in range(w):
-                if trail_buffer[y][x] > 0:
-                    trail_buffer[y][x] = max(0, trail_buffer[y][x] - 15)
+        fade(trail_buffer, TRAIL_FADE)
         
         # Update particles
-        for i, p in enumerate(particles):
-            p.update()
-            
-            # Special behaviors
-            if p.color_type == 2:  # Spiral motion
-                angle = frame * 0.1 + i
-                p.vx = math.cos(angle) * 0.3
-                p.vy = math.sin(angle) * 0.3
-            
-            # Add to trail buffer
-            px, py = int(p.x), int(p.y)
-            if 0 <= px < w and 0 <= py < h:
-                trail_buffer[py][px] = min(255, trail_buffer[py][px] + int(255 * p.life))
+        particles.update()
+        
+        # Special behaviors
+        particles.spin(SPIRAL, frame * 0.1)
+        
+        # Add to trail buffer
+        particles.deposit(trail_buffer)
         
         # Draw everything
-        graphics.set_pen(BLACK)
-        graphics.clear()
+        fb.clear()
         
         # Draw trails
-        for y in range(h):
-            for x in range(w):
-                if trail_buffer[y][x] > 0:
-                    val = trail_buffer[y][x]
-                    # Create gradient trail effect
-                    r = min(255, val)
-                    g = min(255, val // 2)
-                    b = min(255, val // 4)
-                    color = graphics.create_pen(r, g, b)
-                    graphics.set_pen(color)
-                    graphics.pixel(x, y)
+        buf = fb.buf
+        for i in range(w * h):
+            val = trail_buffer[i]
+            if val > 0:
+                # Create gradient trail effect
+                buf[i * 3] = val
+                buf[i * 3 + 1] = val // 2
+                buf[i * 3 + 2] = val // 4
         
         # Draw particles
-        for p in particles:
-            px, py = int(p.x), int(p.y)
-            if 0 <= px < w and 0 <= py < h:
-                r, g, b = p.get_color()
-                color = graphics.create_pen(r, g, b)
-                graphics.set_pen(color)
-                graphics.pixel(px, py)
-        
-        picounicorn.update(graphics)
-        time.sleep(0.02)
+        particles.draw(fb)
+        
+        yield
 
 # 7. GALAGA STYLE ATTACK PATTERNS
 def galaga_attack():
     """Enemies diving in formation"""
+    enemy_colors = ((255, 0, 255), (0, 255, 255))  # Magenta, cyan
+    frames = 150
+    
+    # Enemy positions live in fixed arrays, in 8.8 fixed point
+    enemy_x = array('i', [0] * 4)
+    enemy_y = array('i', [0] * 4)
+    # Every enemy sways by sin(angle) / 2 a frame, the angle growing by 0.1,
+    # and the player slides along a sine; both are tabled once up front
+    sway = array('h', [int(math.sin(0.1 * (f + 1)) * 128) for f in range(frames)])
+    player = array('b', [int(math.sin(f * 0.05) * 3) for f in range(frames)])
+    bottom = (h + 2) << 8
+    
     for wave in range(3):
-        enemies = []
         # Create enemy formation
         for i in range(4):
-            enemies.append({
-                'x': i * 4 + 2,
-                'y': -2 - i,
-                'type': i % 2,
-                'angle': 0
-            })
-        
-        for frame in range(150):
-            graphics.set_pen(BLACK)
-            graphics.clear()
+            enemy_x[i] = (i * 4 + 2) << 8
+            enemy_y[i] = (-2 - i) << 8
+        
+        for frame in range(frames):
+            fb.clear()
             
             # Update enemies
-            for enemy in enemies:
-                # Sine wave diving pattern
-                enemy['angle'] += 0.1
-                enemy['y'] += 0.15
-                enemy['x'] += math.sin(enemy['angle']) * 0.5
+            dx = sway[frame]
+            for i in range(4):
+                # Sine wave diving pattern, 0.15 pixels down a frame
+                enemy_y[i] += 38
+                enemy_x[i] += dx
                 
                 # Wrap around
-                if enemy['y'] > h + 2:
-                    enemy['y'] = -2
-                    enemy['x'] = random.randint(1, w-2)
+                if enemy_y[i] > bottom:
+                    enemy_y[i] = -2 << 8
+                    enemy_x[i] = random.randint(1, w-2) << 8
                 
-                # Draw enemy
-                ex, ey = int(enemy['x']), int(enemy['y'])
-                if 0 <= ex < w and 0 <= ey < h:
-                    if enemy['type'] == 0:
-                        color = graphics.create_pen(255, 0, 255)  # Magenta
-                    else:
-                        color = graphics.create_pen(0, 255, 255)  # Cyan
-                    graphics.set_pen(color)
-                    graphics.pixel(ex, ey)
-                    
+                # Draw enemy; like int(), anything above -1 lands on 0
+                ex = enemy_x[i]
+                ey = enemy_y[i]
+                if -256 < ex < w << 8 and -256 < ey < h << 8:
                     # Simple enemy shape
-                    if 0 <= ex-1 < w:
-                        graphics.pixel(ex-1, ey)
-                    if 0 <= ex+1 < w:
-                        graphics.pixel(ex+1, ey)
+                    SHIP.blit(fb, max(0, ex >> 8) - 1, max(0, ey >> 8),
+                              color=enemy_colors[i % 2])
             
             # Player ship at bottom
-            player_x = w // 2 + int(math.sin(frame * 0.05) * 3)
-            ship_color = graphics.create_pen(0, 255, 0)
-            graphics.set_pen(ship_color)
-            if h-1 >= 0:
-                graphics.pixel(player_x, h-1)
-                if player_x-1 >= 0:
-                    graphics.pixel(player_x-1, h-1)
-                if player_x+1 < w:
-                    graphics.pixel(player_x+1, h-1)
+            SHIP.blit(fb, w // 2 + player[frame] - 1, h - 1)
             
-            picounicorn.update(graphics)
-            time.sleep(0.02)
+            yield
 
 # 8. MATRIX RAIN ENHANCED
 def matrix_rain_enhanced():
     """Enhanced matrix rain with multiple speeds and glyphs"""
-    drops = []
+    # One drop per column in fixed arrays: y and speed in 8.8 fixed point,
+    # tail length and head brightness as bytes
+    drop_y = array('i', [0] * w)
+    speed = bytearray(w)
+    length = bytearray(w)
+    level = bytearray(w)
+    
+    def drop(x, top):
+        drop_y[x] = random.randint(-h << 8, top << 8)
+        speed[x] = random.randint(51, 204)  # 0.2 to 0.8 pixels a frame
+        length[x] = random.randint(3, 6)
+        level[x] = random.randint(127, 255)
+    
     for x in range(w):
-        drops.append({
-            'y': random.uniform(-h, 0),
-            'speed': random.uniform(0.2, 0.8),
-            'length': random.randint(3, 6),
-            'brightness': random.uniform(0.5, 1.0)
-        })
+        drop(x, 0)
     
+    fb.clear()
     for frame in range(200):
-        # Fade effect
-        for y in range(h):
-            for x in range(w):
-                fade = graphics.create_pen(0, 0, 0)
-                graphics.set_pen(fade)
-                graphics.pixel(x, y)
+        # Fade effect: last frame's rain lingers as a green afterglow
+        fade_rgb(fb.buf, RAIN_FADE)
         
         # Update drops
-        for x, drop in enumerate(drops):
-            drop['y'] += drop['speed']
+        for x in range(w):
+            y = drop_y[x] + speed[x]
+            drop_y[x] = y
+            n = length[x]
+            head = level[x]
             
             # Draw drop with tail
-            for i in range(drop['length']):
-                y = int(drop['y'] - i)
-                if 0 <= y < h:
+            for i in range(n):
+                row = y - (i << 8)
+                # Like int(), anything above -1 lands on row 0
+                if -256 < row < h << 8:
+                    row = max(0, row >> 8)
                     if i == 0:
                         # Bright head
-                        brightness = int(255 * drop['brightness'])
-                        color = graphics.create_pen(brightness//4, brightness, brightness//2)
+                        fb.set_pixel(x, row, head >> 2, head, head >> 1)
                     else:
                         # Fading tail
-                        fade_factor = 1 - (i / drop['length'])
-                        brightness = int(150 * fade_factor * drop['brightness'])
-                        color = graphics.create_pen(0, brightness, brightness//4)
-                    
-                    graphics.set_pen(color)
-                    graphics.pixel(x, y)
+                        brightness = 150 * (n - i) * head // (n * 255)
+                        fb.set_pixel(x, row, 0, brightness, brightness >> 2)
             
             # Reset if off screen
-            if drop['y'] - drop['length'] > h:
-                drop['y'] = random.uniform(-h, -2)
-                drop['speed'] = random.uniform(0.2, 0.8)
-                drop['length'] = random.randint(3, 6)
-                drop['brightness'] = random.uniform(0.5, 1.0)
-        
-        picounicorn.update(graphics)
-        time.sleep(0.03)
-
-# Main showcase loop
-print("Retro Arcade & Particle Paradise!")
-print("A: Skip | B: Pause | X: Slower | Y: Faster")
-
-animation_speed = 1.0
-current_anim = 0
+            if y - (n << 8) > h << 8:
+                drop(x, -2)
+        
+        yield
 
+# (name, effect, frames per second)
 animations = [
-    ("Enhanced Particle Trails", enhanced_particle_trails),
-    ("Space Invaders", space_invaders),
-    ("Pac-Man Chase", pacman_chase),
-    ("Tetris Blocks", tetris_blocks),
-    ("Snake Game", snake_game),
-    ("Pong", pong_game),
-    ("Galaga Attack", galaga_attack),
-    ("Matrix Rain Enhanced", matrix_rain_enhanced),
+    ("Enhanced Particle Trails", enhanced_particle_trails, 50),
+    ("Space Invaders", space_invaders, 20),
+    ("Pac-Man Chase", pacman_chase, 33),
+    ("Tetris Blocks", tetris_blocks, 10),
+    ("Snake Game", snake_game, 33),
+    ("Pong", pong_game, 50),
+    ("Galaga Attack", galaga_attack, 50),
+    ("Matrix Rain Enhanced", matrix_rain_enhanced, 33),
 ]
 
-while True:
-    # Check buttons
-    if picounicorn.is_pressed(picounicorn.BUTTON_A):
-        current_anim = (current_anim + 1) % len(animations)
-        time.sleep(0.2)  # Debounce
-    
-    if picounicorn.is_pressed(picounicorn.BUTTON_X):
-        animation_speed = max(0.5, animation_speed * 0.8)
-    
-    if picounicorn.is_pressed(picounicorn.BUTTON_Y):
-        animation_speed = min(2.0, animation_speed * 1.2)
-    
-    # Run current animation
-    name, func = animations[current_anim]
-    print(f"Playing: {name}")
-    func()
-    
-    # Auto-advance
-    current_anim = (current_anim + 1) % len(animations)
\ No newline at end of file
+# Button actions
+def skip(runner):
+    runner.next()
+
+def pause(runner):
+    runner.paused = not runner.paused
+
+# While paused X and Y set the brightness instead of the speed
+def slower(runner):
+    if runner.paused:
+        runner.set_brightness(max(0.1, runner.brightness * 0.8))
+    else:
+        runner.scheduler.speed = max(0.5, runner.scheduler.speed * 0.8)
+
+def faster(runner):
+    if runner.paused:
+        runner.set_brightness(runner.brightness * 1.25)
+    else:
+        runner.scheduler.speed = min(2.0, runner.scheduler.speed * 1.2)
+
+buttons = {
+    PicoUnicorn.BUTTON_A: skip,
+    PicoUnicorn.BUTTON_B: pause,
+    PicoUnicorn.BUTTON_X: slower,
+    PicoUnicorn.BUTTON_Y: faster,
+}
+
+# Main showcase loop
+def main():
+    print("Retro Arcade & Particle Paradise!")
+    print("A: Skip | B: Pause | X: Slower | Y: Faster")
+    print("Paused, X: Dimmer | Y: Brighter")
+
+    # Effects run one frame at a time, auto-advancing when they finish
+    AsyncRunner(picounicorn, graphics, fb, animations, buttons).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Compact recorded clips, played back from flash.
+
+A clip is a recorded effect: palette-indexed frames, each stored either whole
+(a key frame) or as the pixels that changed since the previous frame. It is
+written on the host by record.py and played on the Pico without running the
+effect at all:
+
+    effects = [clip_entry("Shimmer", "shimmer.clip", fb)]
+
+clip_entry takes the playlist fps from the clip's header, so the clip plays
+at the rate it was recorded at.
+
+Layout, all little-endian:
+
+    header   "UCLP", version, width, height, fps (0 = unpaced),
+             colours - 1, frame count (u16), largest frame payload (u16)
+    palette  colours * 3 bytes of RGB
+    frames   type (u8), payload length (u16), payload
+
+A KEY payload is run-length encoded, (count, index) pairs. A DELTA payload is
+a list of (skip, count) pairs each followed by count indices: skip unchanged
+pixels, then overwrite count pixels. An unchanged frame has an empty payload.
+
+The player reads each payload with readinto into one buffer sized from the
+header, and decodes straight into fb.buf. A short read (a truncated file)
+ends playback rather than decoding what is left of the previous frame. A
+delta frame touches only the pixels that changed, so playback costs almost
+nothing whatever the effect.
+"""
+import struct
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+MAGIC = b"UCLP"
+VERSION = 1
+HEADER = "<4sBBBBBHH"
+HEADER_SIZE = struct.calcsize(HEADER)
+FRAME_SIZE = 3
+
+KEY = 0
+DELTA = 1
+
+# Frames between forced key frames when recording
+KEY_INTERVAL = 60
+
+
+def _palette(frames):
+    """Colours of every frame, dropping low bits until at most 256 remain"""
+    for shift in range(8):
+        mask = (0xFF << shift) & 0xFF
+        colours = {}
+        for frame in frames:
+            for i in range(0, len(frame), 3):
+                colours[(frame[i] & mask, frame[i + 1] & mask, frame[i + 2] & mask)] = 0
+                if len(colours) > 256:
+                    break
+            if len(colours) > 256:
+                break
+        if len(colours) <= 256:
+            palette = sorted(colours)
+            for index, colour in enumerate(palette):
+                colours[colour] = index
+            return palette, colours, mask
+    raise ValueError("too many colours")
+
+
+def _encode_key(cur):
+    out = bytearray()
+    i = 0
+    n = len(cur)
+    while i < n:
+        start = i
+        while i < n and cur[i] == cur[start] and i - start < 255:
+            i += 1
+        out.append(i - start)
+        out.append(cur[start])
+    return out
+
+
+def _encode_delta(prev, cur):
+    out = bytearray()
+    i = 0
+    n = len(cur)
+    while i < n:
+        start = i
+        while i < n and cur[i] == prev[i] and i - start < 255:
+            i += 1
+        skip = i - start
+        start = i
+        while i < n and cur[i] != prev[i] and i - start < 255:
+            i += 1
+        if i == start and i == n:
+            # Nothing changes from here to the end
+            break
+        out.append(skip)
+        out.append(i - start)
+        out += cur[start:i]
+    return out
+
+
+def write(path, frames, w, h, fps=None):
+    """Write a list of w*h*3 RGB frames (fb.buf snapshots) as a clip"""
+    palette, lookup, mask = _palette(frames)
+    payloads = []
+    prev = None
+    for number, frame in enumerate(frames):
+        cur = bytearray(w * h)
+        for p in range(w * h):
+            i = p * 3
+            cur[p] = lookup[(frame[i] & mask, frame[i + 1] & mask, frame[i + 2] & mask)]
+        key = _encode_key(cur)
+        if prev is None or number % KEY_INTERVAL == 0:
+            payloads.append((KEY, key))
+        else:
+            delta = _encode_delta(prev, cur)
+            payloads.append((DELTA, delta) if len(delta) <= len(key) else (KEY, key))
+        prev = cur
+    largest = max([len(p) for _, p in payloads] + [1])
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER, MAGIC, VERSION, w, h, fps or 0, len(palette) - 1,
+                            len(payloads), largest))
+        for colour in palette:
+            f.write(bytes(colour))
+        for kind, payload in payloads:
+            f.write(struct.pack("<BH", kind, len(payload)))
+            f.write(payload)
+
+
+if micropython:
+    @micropython.viper
+    def _decode_key(payload: ptr8, length: int, palette: ptr8, buf: ptr8):
+        i = 0
+        j = 0
+        while i < length:
+            count = payload[i]
+            c = payload[i + 1] * 3
+            r = palette[c]
+            g = palette[c + 1]
+            b = palette[c + 2]
+            end = j + count * 3
+            while j < end:
+                buf[j] = r
+                buf[j + 1] = g
+                buf[j + 2] = b
+                j += 3
+            i += 2
+
+    @micropython.viper
+    def _decode_delta(payload: ptr8, length: int, palette: ptr8, buf: ptr8):
+        i = 0
+        j = 0
+        while i < length:
+            j += payload[i] * 3
+            count = payload[i + 1]
+            i += 2
+            end = i + count
+            while i < end:
+                c = payload[i] * 3
+                buf[j] = palette[c]
+                buf[j + 1] = palette[c + 1]
+                buf[j + 2] = palette[c + 2]
+                i += 1
+                j += 3
+else:
+    def _decode_key(payload, length, palette, buf):
+        j = 0
+        for i in range(0, length, 2):
+            c = payload[i + 1] * 3
+            end = j + payload[i] * 3
+            buf[j:end] = palette[c:c + 3] * payload[i]
+            j = end
+
+    def _decode_delta(payload, length, palette, buf):
+        i = 0
+        j = 0
+        while i < length:
+            j += payload[i] * 3
+            count = payload[i + 1]
+            i += 2
+            for k in range(i, i + count):
+                c = payload[k] * 3
+                buf[j:j + 3] = palette[c:c + 3]
+                j += 3
+            i += count
+
+
+if micropython:
+    def _read_payload(clip, length):
+        # MicroPython streams take a byte count, so the buffer isn't sliced
+        return clip.file.readinto(clip.payload, length)
+else:
+    def _read_payload(clip, length):
+        return clip.file.readinto(clip.view[:length])
+
+
+class Clip:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, w, h, fps, colours, frames, largest = struct.unpack(
+            HEADER, self.file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a clip: %s" % path)
+        self.width = w
+        self.height = h
+        self.fps = fps or None
+        self.frames = frames
+        self.palette = self.file.read((colours + 1) * 3)
+        self.start = HEADER_SIZE + len(self.palette)
+        # Reused for every frame; on the Pico nothing is allocated while
+        # playing (the host reads through a slice of view)
+        self.header = bytearray(FRAME_SIZE)
+        self.payload = bytearray(largest)
+        self.view = memoryview(self.payload)
+        self.frame = 0
+
+    def rewind(self):
+        self.file.seek(self.start)
+        self.frame = 0
+
+    def read(self, buf):
+        """Decode the next frame into a w*h*3 buffer; False at the end"""
+        if self.frame >= self.frames:
+            return False
+        header = self.header
+        if self.file.readinto(header) != FRAME_SIZE:
+            return False
+        length = header[1] | header[2] << 8
+        if length:
+            if _read_payload(self, length) != length:
+                return False
+            if header[0] == KEY:
+                _decode_key(self.payload, length, self.palette, buf)
+            else:
+                _decode_delta(self.payload, length, self.palette, buf)
+        self.frame += 1
+        return True
+
+    def close(self):
+        self.file.close()
+
+
+def play(path, fb, loops=1):
+    """Generator effect: show a clip in fb, one frame per yield"""
+    clip = Clip(path)
+    if clip.width != fb.width or clip.height != fb.height:
+        clip.close()
+        raise ValueError("clip is %dx%d" % (clip.width, clip.height))
+    try:
+        for _ in range(loops):
+            clip.rewind()
+            while clip.read(fb.buf):
+                yield
+    finally:
+        clip.close()
+
+
+class clip_effect:
+    """Effect function that plays a recorded clip; fps is the recorded rate"""
+
+    def __init__(self, path, fb, loops=1):
+        # Named after the file, as the tools look effects up by __name__
+        self.__name__ = path.rsplit("/", 1)[-1].split(".")[0]
+        self.path = path
+        self.fb = fb
+        self.loops = loops
+        clip = Clip(path)
+        self.fps = clip.fps
+        clip.close()
+
+    def __call__(self):
+        return play(self.path, self.fb, self.loops)
+
+
+def clip_entry(name, path, fb, loops=1):
+    """(name, effect, fps) playlist entry for a clip, at its recorded fps"""
+    effect = clip_effect(path, fb, loops)
+    return name, effect, effect.fps
@@ -0,0 +1,97 @@
+"""Table-driven fade for trail buffers.
+
+A decay step is a 256-entry table mapping each byte value to its faded
+value, built once. fade() runs every byte of a flat bytearray through it:
+
+    FADE = linear(15)
+    trail = bytearray(w * h)
+    while True:
+        fade(trail, FADE)
+        ...
+
+linear(step) subtracts a fixed amount, exponential(factor) scales by a
+fraction. per_channel() joins three tables into one for RGB buffers laid out
+like fb.buf, so each channel can fade at its own rate with fade_rgb().
+
+fade16() is the exponential fade for array('H') buffers of 8.8 fixed-point
+values (see dither.py), where a table would not fit. Its low bits keep
+fading after an 8-bit value would have stalled one level above black.
+
+On the Pico the passes are viper loops; on CPython they use bytes.translate,
+which does the same lookup in C.
+"""
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+
+def linear(step):
+    """Subtract step from every value, stopping at 0"""
+    return bytes(max(0, v - step) for v in range(256))
+
+
+def exponential(factor):
+    """Multiply every value by factor (0..1), rounding down"""
+    return bytes(int(v * factor) for v in range(256))
+
+
+def per_channel(red, green, blue):
+    """One 768-byte table for fade_rgb(): red, then green, then blue"""
+    return bytes(red) + bytes(green) + bytes(blue)
+
+
+if micropython:
+    @micropython.viper
+    def _fade(buf: ptr8, table: ptr8, n: int):
+        i = 0
+        while i < n:
+            buf[i] = table[buf[i]]
+            i += 1
+
+    @micropython.viper
+    def _fade_rgb(buf: ptr8, table: ptr8, n: int):
+        i = 0
+        while i < n:
+            buf[i] = table[buf[i]]
+            buf[i + 1] = table[256 + buf[i + 1]]
+            buf[i + 2] = table[512 + buf[i + 2]]
+            i += 3
+
+    @micropython.viper
+    def _fade16(buf: ptr16, shift: int, n: int):
+        i = 0
+        while i < n:
+            v = buf[i]
+            if v:
+                buf[i] = v - (v >> shift) - 1
+            i += 1
+
+    def fade(buf, table):
+        """Replace every byte v of buf with table[v]"""
+        _fade(buf, table, len(buf))
+
+    def fade16(buf, shift):
+        """Take 1/2**shift off every value of an array('H'), reaching 0"""
+        _fade16(buf, shift, len(buf))
+
+    def fade_rgb(buf, table):
+        """fade() with a per_channel() table on a three-bytes-per-pixel buffer"""
+        _fade_rgb(buf, table, len(buf))
+else:
+    def fade(buf, table):
+        """Replace every byte v of buf with table[v]"""
+        buf[:] = buf.translate(table)
+
+    def fade16(buf, shift):
+        """Take 1/2**shift off every value of an array('H'), reaching 0"""
+        for i in range(len(buf)):
+            v = buf[i]
+            if v:
+                buf[i] = v - (v >> shift) - 1
+
+    def fade_rgb(buf, table):
+        """fade() with a per_channel() table on a three-bytes-per-pixel buffer"""
+        buf[0::3] = buf[0::3].translate(table[0:256])
+        buf[1::3] = buf[1::3].translate(table[256:512])
+        buf[2::3] = buf[2::3].translate(table[512:768])
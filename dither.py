@@ -0,0 +1,290 @@
+"""Temporal dithering from 8.8 fixed-point colour to 8-bit frames.
+
+    dither = Dither(w * h)
+    while True:
+        ... write dither.target ...
+        dither.render(fb.buf)
+        yield
+
+Effects write dither.target, an array('H') laid out like fb.buf with each
+channel in 8.8 fixed point (256 = one 8-bit level). Every render() writes the
+next 8-bit frame into buf, rounding each channel up or down so that over a
+few frames it averages out to the fractional value. That gives smooth fades
+and dim colours the 8-bit panel can't show in a single frame, for one pass
+over the buffer per frame whatever the content.
+
+Two ways of choosing when to round up:
+
+- ERROR: every channel keeps the fraction it has not shown yet in an error
+  accumulator (sigma-delta) and rounds up whenever that passes one level.
+- BCM: a fixed schedule over `subframes` frames (a power of two). The low
+  bits of the fraction pick which sub-frames round up, like the bit planes of
+  binary code modulation. A precomputed phase per pixel staggers the
+  schedule so neighbouring pixels don't all step on the same frame.
+
+Given the FrameBuffer, Dither(n, mode, subframes, fb) dithers in what the
+panel shows rather than in linear levels. fb's brightness and gamma table
+maps many dark inputs to the same output (0-14 all show 0 at gamma 2.2),
+so rounding a dim value between neighbouring inputs would show nothing.
+Instead a curve table takes each target, a quarter of a level at a time,
+through the same brightness and gamma to an output level, and holds the
+two inputs whose outputs lie either side of it and how far between them
+it falls. render() then rounds between those two, and push's table turns
+them into an average of the intended output. The tables are rebuilt when
+fb's table changes.
+"""
+from array import array
+import random
+
+from framebuffer import IDENTITY
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+ERROR = 0
+BCM = 1
+
+# Curve table entries cover 1 << CURVE_SHIFT of a target's 8.8 steps
+CURVE_SHIFT = 6
+
+
+def _thresholds(subframes):
+    # Sub-frame s rounds up fractions above its threshold; bit-reversed
+    # order spreads the round-ups evenly across the cycle
+    bits = 0
+    while 1 << bits < subframes:
+        bits += 1
+    out = bytearray(subframes)
+    for s in range(subframes):
+        r = 0
+        for b in range(bits):
+            if s >> b & 1:
+                r |= 1 << (bits - 1 - b)
+        out[s] = (r * 256 + 128) // subframes
+    return bytes(out)
+
+
+def _curve(lut, brightness, gamma):
+    """low, high and fraction of each curve step for a brightness table"""
+    size = 65536 >> CURVE_SHIFT
+    low = bytearray(size)
+    high = bytearray(size)
+    frac = bytearray(size)
+    a = 0
+    for j in range(size):
+        x = min(1.0, ((j << CURVE_SHIFT) + (1 << CURVE_SHIFT - 1)) / 65280)
+        out = x ** gamma * brightness * 255
+        # Brightest input showing no more than out, and the next one up
+        # that shows more
+        while a < 255 and lut[a + 1] <= out:
+            a += 1
+        b = a + 1
+        while b < 256 and lut[b] == lut[a]:
+            b += 1
+        low[j] = a
+        if b < 256:
+            high[j] = b
+            frac[j] = min(255, int((out - lut[a]) * 256 / (lut[b] - lut[a])))
+        else:
+            high[j] = a
+    return low, high, frac
+
+
+if micropython:
+    @micropython.viper
+    def _error(target: ptr16, error: ptr8, buf: ptr8, n: int):
+        i = 0
+        while i < n:
+            v = target[i]
+            out = v >> 8
+            e = error[i] + (v & 255)
+            if e >= 256:
+                e -= 256
+                if out < 255:
+                    out += 1
+            error[i] = e
+            buf[i] = out
+            i += 1
+
+    # Viper functions take at most four arguments on older firmware, so
+    # the state is read off the Dither
+    @micropython.viper
+    def _bcm(dither, buf: ptr8):
+        target = ptr16(dither.target)
+        phase = ptr8(dither.phase)
+        thresholds = ptr8(dither.thresholds)
+        n = int(dither.n)
+        subframe = int(dither.subframe)
+        mask = int(dither.subframes) - 1
+        p = 0
+        i = 0
+        while p < n:
+            t = thresholds[(subframe + phase[p]) & mask]
+            end = i + 3
+            while i < end:
+                v = target[i]
+                out = v >> 8
+                if (v & 255) > t and out < 255:
+                    out += 1
+                buf[i] = out
+                i += 1
+            p += 1
+    @micropython.viper
+    def _error_curve(dither, buf: ptr8):
+        target = ptr16(dither.target)
+        error = ptr8(dither.error)
+        low = ptr8(dither.low)
+        high = ptr8(dither.high)
+        frac = ptr8(dither.frac)
+        n = int(dither.n) * 3
+        i = 0
+        while i < n:
+            j = target[i] >> 6  # CURVE_SHIFT
+            out = low[j]
+            e = error[i] + frac[j]
+            if e >= 256:
+                e -= 256
+                out = high[j]
+            error[i] = e
+            buf[i] = out
+            i += 1
+
+    @micropython.viper
+    def _bcm_curve(dither, buf: ptr8):
+        target = ptr16(dither.target)
+        phase = ptr8(dither.phase)
+        thresholds = ptr8(dither.thresholds)
+        low = ptr8(dither.low)
+        high = ptr8(dither.high)
+        frac = ptr8(dither.frac)
+        n = int(dither.n)
+        subframe = int(dither.subframe)
+        mask = int(dither.subframes) - 1
+        p = 0
+        i = 0
+        while p < n:
+            t = thresholds[(subframe + phase[p]) & mask]
+            end = i + 3
+            while i < end:
+                j = target[i] >> 6  # CURVE_SHIFT
+                if frac[j] > t:
+                    buf[i] = high[j]
+                else:
+                    buf[i] = low[j]
+                i += 1
+            p += 1
+else:
+    def _error(target, error, buf, n):
+        for i in range(n):
+            v = target[i]
+            out = v >> 8
+            e = error[i] + (v & 255)
+            if e >= 256:
+                e -= 256
+                if out < 255:
+                    out += 1
+            error[i] = e
+            buf[i] = out
+
+    def _bcm(dither, buf):
+        target = dither.target
+        phase = dither.phase
+        thresholds = dither.thresholds
+        subframe = dither.subframe
+        mask = dither.subframes - 1
+        for p in range(dither.n):
+            t = thresholds[(subframe + phase[p]) & mask]
+            for i in range(p * 3, p * 3 + 3):
+                v = target[i]
+                out = v >> 8
+                if (v & 255) > t and out < 255:
+                    out += 1
+                buf[i] = out
+
+    def _error_curve(dither, buf):
+        target = dither.target
+        error = dither.error
+        low = dither.low
+        high = dither.high
+        frac = dither.frac
+        for i in range(dither.n * 3):
+            j = target[i] >> CURVE_SHIFT
+            out = low[j]
+            e = error[i] + frac[j]
+            if e >= 256:
+                e -= 256
+                out = high[j]
+            error[i] = e
+            buf[i] = out
+
+    def _bcm_curve(dither, buf):
+        target = dither.target
+        phase = dither.phase
+        thresholds = dither.thresholds
+        low = dither.low
+        high = dither.high
+        frac = dither.frac
+        subframe = dither.subframe
+        mask = dither.subframes - 1
+        for p in range(dither.n):
+            t = thresholds[(subframe + phase[p]) & mask]
+            for i in range(p * 3, p * 3 + 3):
+                j = target[i] >> CURVE_SHIFT
+                buf[i] = high[j] if frac[j] > t else low[j]
+
+
+class Dither:
+    def __init__(self, n, mode=ERROR, subframes=4, fb=None):
+        """n pixels; subframes is the BCM cycle length, a power of two up to 256.
+
+        With fb, dither toward what fb's brightness and gamma table shows.
+        """
+        if subframes & (subframes - 1) or not 1 <= subframes <= 256:
+            raise ValueError("subframes must be a power of two up to 256")
+        self.n = n
+        self.mode = mode
+        self.subframes = subframes
+        self.subframe = 0
+        self.target = array('H', [0] * (n * 3))
+        self.error = bytearray(n * 3)
+        self.thresholds = _thresholds(subframes)
+        self.phase = bytearray(random.getrandbits(8) for _ in range(n))
+        self.fb = fb
+        self.lut = None
+        self.low = None
+        self.high = None
+        self.frac = None
+
+    def clear(self):
+        for i in range(len(self.target)):
+            self.target[i] = 0
+        self.error[:] = bytes(len(self.error))
+
+    def _follow(self):
+        # Rebuild the curve if fb's table changed; none while it is identity
+        fb = self.fb
+        lut = fb.lut
+        if lut is self.lut:
+            return
+        self.lut = lut
+        if lut is IDENTITY:
+            self.low = None
+        else:
+            self.low, self.high, self.frac = _curve(lut, fb.brightness, fb.gamma)
+
+    def render(self, buf):
+        """Write the next 8-bit frame of target into buf"""
+        if self.fb is not None:
+            self._follow()
+        if self.low is not None:
+            if self.mode == ERROR:
+                _error_curve(self, buf)
+            else:
+                _bcm_curve(self, buf)
+        elif self.mode == ERROR:
+            _error(self.target, self.error, buf, self.n * 3)
+        else:
+            _bcm(self, buf)
+        self.subframe = (self.subframe + 1) & (self.subframes - 1)
@@ -1,8 +1,17 @@
 from picounicorn import PicoUnicorn
 from picographics import PicoGraphics, DISPLAY_UNICORN_PACK
-import time
 import math
 import random
+from array import array
+from framebuffer import FrameBuffer, GAMMA
+from particles import ParticleSystem, Emitter
+from decay import fade16
+from dither import Dither, ERROR, BCM
+from waves import vector, wave
+from geometry import geometry
+from oscillators import OscillatorBank, increment
+from hsv import hsv, fill_row
+from dualcore import DualCoreRunner
 
 # Initialize both PicoUnicorn and PicoGraphics
 picounicorn = PicoUnicorn()
@@ -12,8 +21,22 @@ graphics = PicoGraphics(display=DISPLAY_UNICORN_PACK)
 w = picounicorn.get_width()
 h = picounicorn.get_height()
 
+# Spread persistence_trails particles over neighbouring pixels by coverage
+SUBPIXEL_TRAILS = False
+# persistence_trails' history loses 1/2**HISTORY_SHIFT of its value per frame
+HISTORY_SHIFT = 3
+
 # Create base colors
-BLACK = graphics.create_pen(0, 0, 0)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+
+# Effects write one frame straight into the framebuffer and yield
+fb = FrameBuffer(w, h)
+fb.set_brightness(1.0, GAMMA)
+buf = fb.buf
 
 # TEMPORAL COLOR MIXING AND PERSISTENCE OF VISION EFFECTS
 
@@ -48,22 +71,27 @@ def subpixel_shimmer():
     dither = TemporalDither()
     phase_offset = [[random.randint(0, 3) for _ in range(w)] for _ in range(h)]
     
+    # Color candidates
+    color1 = RED
+    color2 = GREEN
+    color3 = BLUE
+    color4 = YELLOW
+    
+    # Base wave pattern, one term per column and one per row
+    wave1 = vector(w)
+    wave2 = vector(h)
+    
     for frame in range(300):
         dither.update()
         t = frame * 0.02
+        wave(wave1, 0.5, t, scale=0.5, offset=0.5)
+        wave(wave2, 0.5, t * 1.3, scale=0.5, offset=0.5)
+        i = 0
         
         for y in range(h):
+            row = wave2[y]
             for x in range(w):
-                # Base wave pattern
-                wave1 = math.sin(x * 0.5 + t) * 0.5 + 0.5
-                wave2 = math.sin(y * 0.5 + t * 1.3) * 0.5 + 0.5
-                combined = wave1 * wave2
-                
-                # Create multiple color candidates
-                color1 = graphics.create_pen(255, 0, 0)      # Red
-                color2 = graphics.create_pen(0, 255, 0)      # Green
-                color3 = graphics.create_pen(0, 0, 255)      # Blue
-                color4 = graphics.create_pen(255, 255, 0)    # Yellow
+                combined = wave1[x] * row
                 
                 # Rapid switching creates color mixing illusion
                 if frame % 4 == 0:
@@ -75,65 +103,78 @@ def subpixel_shimmer():
                 else:
                     color = dither.get_mixed_color(color2, color4, combined, phase_offset[y][x])
                 
-                graphics.set_pen(color)
-                graphics.pixel(x, y)
+                r, g, b = color
+                buf[i] = r
+                buf[i + 1] = g
+                buf[i + 2] = b
+                i += 3
         
-        picounicorn.update(graphics)
+        yield
         # No sleep - maximum framerate for persistence of vision!
 
 # 3. CHROMATIC ABERRATION EFFECT
 def chromatic_aberration():
     """Simulate color separation by drawing R, G, B channels at different times"""
+    # Circular pattern around the centre, from the shared distance map
+    g = geometry(w, h)
+    shifted = [0.0] * (w * h)
+    
     for frame in range(200):
         t = frame * 0.02
         
         # Draw only one color channel per frame
         channel = frame % 3
         
-        for y in range(h):
-            for x in range(w):
-                # Create circular pattern
-                cx = x - w/2
-                cy = y - h/2
-                dist = math.sqrt(cx*cx + cy*cy)
-                
-                # Offset each channel differently
-                if channel == 0:  # Red
-                    offset_x = x + math.sin(t) * 0.5
-                    offset_y = y
-                elif channel == 1:  # Green
-                    offset_x = x
-                    offset_y = y + math.cos(t) * 0.5
-                else:  # Blue
-                    offset_x = x - math.sin(t) * 0.5
-                    offset_y = y - math.cos(t) * 0.5
-                
-                # Sample pattern at offset position
-                pattern = math.sin(dist - t * 5) * 0.5 + 0.5
-                
-                # Draw only the active channel
-                if pattern > 0.3:
-                    if channel == 0:
-                        color = graphics.create_pen(255, 0, 0)
-                    elif channel == 1:
-                        color = graphics.create_pen(0, 255, 0)
-                    else:
-                        color = graphics.create_pen(0, 0, 255)
-                    
-                    graphics.set_pen(color)
-                    graphics.pixel(x, y)
-                else:
-                    graphics.set_pen(BLACK)
-                    graphics.pixel(x, y)
+        # Offset each channel differently
+        if channel == 0:  # Red
+            offset_x = math.sin(t) * 0.5
+            offset_y = 0
+        elif channel == 1:  # Green
+            offset_x = 0
+            offset_y = math.cos(t) * 0.5
+        else:  # Blue
+            offset_x = -math.sin(t) * 0.5
+            offset_y = -math.cos(t) * 0.5
         
-        picounicorn.update(graphics)
-        # Minimal sleep for persistence effect
+        # Sample pattern at offset position
+        g.shift(g.dist, offset_x, offset_y, shifted)
+        
+        i = 0
+        for d in shifted:
+            pattern = math.sin(d - t * 5) * 0.5 + 0.5
+            
+            # Draw only the active channel
+            buf[i] = 0
+            buf[i + 1] = 0
+            buf[i + 2] = 0
+            if pattern > 0.3:
+                buf[i + channel] = 255
+            i += 3
+        
+        yield
 
 # 4. INTERLACED PATTERNS
 def interlaced_waves():
     """Use interlacing to create impossible gradients"""
+    # Complex wave interference, split into column and row terms;
+    # sin((x + y) * 0.5 + t) comes from the angle-addition rule
+    wave1 = vector(w)
+    wave2 = vector(h)
+    sin3 = vector(w)
+    cos3 = vector(w)
+    cos_y = wave(vector(h), 0.5, 0, math.cos)
+    sin_y = wave(vector(h), 0.5, 0)
+    
+    # One row of hues and brightnesses, converted together
+    hues = bytearray(w)
+    values = bytearray(w)
+    
     for frame in range(400):
         t = frame * 0.01
+        wave(wave1, 0.8, t * 2)
+        wave(wave2, 1.2, t * 3, math.cos)
+        wave(sin3, 0.5, t)
+        wave(cos3, 0.5, t, math.cos)
         
         # Even/odd frame interlacing
         interlace = frame % 2
@@ -141,147 +182,110 @@ def interlaced_waves():
         for y in range(h):
             # Only update every other row per frame
             if y % 2 == interlace:
+                w2 = wave2[y]
+                cy = cos_y[y]
+                sy = sin_y[y]
                 for x in range(w):
-                    # Complex wave interference
-                    wave1 = math.sin(x * 0.8 + t * 2)
-                    wave2 = math.cos(y * 1.2 + t * 3)
-                    wave3 = math.sin((x + y) * 0.5 + t)
-                    
                     # Combine waves
-                    combined = (wave1 + wave2 + wave3) / 3
+                    combined = (wave1[x] + w2 + sin3[x] * cy + cos3[x] * sy) / 3
                     
                     # Alternate between color sets each frame
                     if interlace == 0:
                         if combined > 0:
-                            hue = 0.0  # Red spectrum
+                            hues[x] = 0  # Red spectrum
                         else:
-                            hue = 0.3  # Green spectrum
+                            hues[x] = 77  # Green spectrum
                     else:
                         if combined > 0:
-                            hue = 0.6  # Blue spectrum
+                            hues[x] = 154  # Blue spectrum
                         else:
-                            hue = 0.8  # Magenta spectrum
+                            hues[x] = 205  # Magenta spectrum
                     
-                    brightness = abs(combined)
-                    PEN = graphics.create_pen_hsv(hue, 1.0, brightness)
-                    graphics.set_pen(PEN)
-                    graphics.pixel(x, y)
+                    values[x] = int(abs(combined) * 255)
+                fill_row(buf, y * w * 3, hues, values)
         
-        picounicorn.update(graphics)
+        yield
 
 # 5. PHASE-SHIFTED COLOR CYCLING
 def phase_cycling():
     """Each pixel cycles through colors at different phases"""
-    # Initialize phase for each pixel
-    phases = [[random.uniform(0, 2 * math.pi) for _ in range(w)] for _ in range(h)]
-    frequencies = [[random.uniform(0.5, 2.0) for _ in range(w)] for _ in range(h)]
+    # Each pixel has its own phase and frequency, as an integer oscillator
+    osc = OscillatorBank(w * h)
+    for i in range(w * h):
+        osc.set(i, random.getrandbits(16), increment(random.uniform(0.5, 2.0), 0.02))
+    
+    # Bit-plane dithering shows the 8.8 colours over 8 sub-frames, in the
+    # levels the gamma table puts on the panel
+    dither = Dither(w * h, BCM, 8, fb)
     
     for frame in range(500):
-        t = frame * 0.02
+        osc.render16(dither.target)
+        dither.render(buf)
+        osc.advance()
         
-        for y in range(h):
-            for x in range(w):
-                # Each pixel has its own phase and frequency
-                phase = phases[y][x]
-                freq = frequencies[y][x]
-                
-                # Calculate color components with different phase offsets
-                r = int((math.sin(t * freq + phase) + 1) * 127)
-                g = int((math.sin(t * freq + phase + 2.094) + 1) * 127)
-                b = int((math.sin(t * freq + phase + 4.189) + 1) * 127)
-                
-                # Rapid switching between primary colors
-                cycle = int(t * 20) % 3
-                if cycle == 0:
-                    color = graphics.create_pen(r, 0, 0)
-                elif cycle == 1:
-                    color = graphics.create_pen(0, g, 0)
-                else:
-                    color = graphics.create_pen(0, 0, b)
-                
-                graphics.set_pen(color)
-                graphics.pixel(x, y)
-        
-        picounicorn.update(graphics)
+        yield
 
 # 6. PERSISTENCE TRAILS WITH COLOR MEMORY
 def persistence_trails():
     """Use persistence of vision to create color trails"""
-    # Color history for each pixel
-    history = [[[0, 0, 0] for _ in range(w)] for _ in range(h)]
+    # Color history for each pixel in 8.8 fixed point, laid out like fb.buf;
+    # error diffusion over frames shows the fractions, through the gamma
+    # table, so trails fade out smoothly on the panel too
+    dither = Dither(w * h, ERROR, fb=fb)
+    history = dither.target
     
-    particles = []
-    for _ in range(5):
-        particles.append({
-            'x': random.uniform(0, w),
-            'y': random.uniform(0, h),
-            'vx': random.uniform(-1, 1),
-            'vy': random.uniform(-1, 1),
-            'hue': random.uniform(0, 1)
-        })
+    particles = ParticleSystem(5, w, h)
+    particles.emit(Emitter(0, vx=(-1, 1), vy=(-1, 1), decay=(0, 0)), 5)
+    hues = particles.hue
+    colors = array('H', [0] * (particles.count * 3))
+    for i in range(particles.count):
+        hues[i] = random.uniform(0, 1)
     
     for frame in range(400):
         # Update particles
-        for p in particles:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            
-            # Bounce
-            if p['x'] <= 0 or p['x'] >= w-1:
-                p['vx'] = -p['vx']
-            if p['y'] <= 0 or p['y'] >= h-1:
-                p['vy'] = -p['vy']
-            
-            # Update hue
-            p['hue'] = (p['hue'] + 0.01) % 1.0
+        particles.bounce()
         
-        # Render with temporal effects
-        for y in range(h):
-            for x in range(w):
-                # Check if particle is here
-                particle_here = False
-                for p in particles:
-                    if abs(p['x'] - x) < 1 and abs(p['y'] - y) < 1:
-                        particle_here = True
-                        # Convert HSV to RGB manually for history
-                        r, g, b = hsv_to_rgb(p['hue'], 1.0, 1.0)
-                        history[y][x] = [r, g, b]
-                        break
-                
-                if particle_here:
-                    # Full brightness
-                    r, g, b = history[y][x]
-                else:
-                    # Fade history
-                    history[y][x][0] = max(0, history[y][x][0] - 5)
-                    history[y][x][1] = max(0, history[y][x][1] - 5)
-                    history[y][x][2] = max(0, history[y][x][2] - 5)
-                    r, g, b = history[y][x]
-                
-                # Temporal dithering for smooth fades
-                if frame % 3 == 0:
-                    color = graphics.create_pen(r, 0, 0)
-                elif frame % 3 == 1:
-                    color = graphics.create_pen(0, g, 0)
-                else:
-                    color = graphics.create_pen(0, 0, b)
-                
-                graphics.set_pen(color)
-                graphics.pixel(x, y)
+        # Update hue
+        for p in range(particles.count):
+            hues[p] = (hues[p] + 0.01) % 1.0
+            # Channels straight from the packed colour, no tuple per particle
+            pen = hsv(int(hues[p] * 256), 255, 255)
+            colors[p * 3] = pen >> 8 & 0xFF00
+            colors[p * 3 + 1] = pen & 0xFF00
+            colors[p * 3 + 2] = (pen & 0xFF) << 8
+        
+        # Fade history, then stamp the particles at their own positions
+        fade16(history, HISTORY_SHIFT)
+        particles.splat(history, colors, SUBPIXEL_TRAILS)
         
-        picounicorn.update(graphics)
+        # Temporal dithering for smooth fades
+        dither.render(buf)
+        
+        yield
 
 # 7. QUANTUM COLOR SUPERPOSITION
 def quantum_superposition():
     """Simulate quantum superposition with rapid state changes"""
+    # Multiple wave functions, each a column term times a row term
+    sx = vector(w)
+    cy = vector(h)
+    cx = vector(w)
+    sy = vector(h)
+    
     for frame in range(300):
         t = frame * 0.02
+        wave(sx, 0.5, t)
+        wave(cy, 0.5, t, math.cos)
+        wave(cx, 0.7, -t, math.cos)
+        wave(sy, 0.7, -t)
+        i = 0
         
         for y in range(h):
+            c1 = cy[y]
+            s2 = sy[y]
             for x in range(w):
-                # Multiple wave functions
-                psi1 = math.sin(x * 0.5 + t) * math.cos(y * 0.5 + t)
-                psi2 = math.cos(x * 0.7 - t) * math.sin(y * 0.7 - t)
+                psi1 = sx[x] * c1
+                psi2 = cx[x] * s2
                 
                 # Probability amplitudes
                 prob1 = psi1 * psi1
@@ -291,27 +295,26 @@ def quantum_superposition():
                 # based on measurement (frame number)
                 measurement = (frame + x + y) % 4
                 
+                buf[i] = 0
+                buf[i + 1] = 0
+                buf[i + 2] = 0
                 if measurement == 0:
                     # Red state
-                    intensity = int(prob1 * 255)
-                    color = graphics.create_pen(intensity, 0, 0)
+                    buf[i] = int(prob1 * 255)
                 elif measurement == 1:
                     # Green state
-                    intensity = int(prob2 * 255)
-                    color = graphics.create_pen(0, intensity, 0)
+                    buf[i + 1] = int(prob2 * 255)
                 elif measurement == 2:
                     # Blue state
-                    intensity = int((prob1 + prob2) * 127)
-                    color = graphics.create_pen(0, 0, intensity)
+                    buf[i + 2] = int((prob1 + prob2) * 127)
                 else:
                     # Superposition (yellow)
                     intensity = int(math.sqrt(prob1 * prob2) * 255)
-                    color = graphics.create_pen(intensity, intensity, 0)
-                
-                graphics.set_pen(color)
-                graphics.pixel(x, y)
+                    buf[i] = intensity
+                    buf[i + 1] = intensity
+                i += 3
         
-        picounicorn.update(graphics)
+        yield
 
 # 8. RETINAL FATIGUE AFTERIMAGE
 def afterimage_effect():
@@ -320,98 +323,74 @@ def afterimage_effect():
     primary_frames = 60
     transition_frames = 20
     
+    primaries = (RED, GREEN, BLUE)
+    
     for cycle in range(3):
         # Primary image phase
         for frame in range(primary_frames):
+            fb.clear()
+            r, g, b = primaries[cycle]
             for y in range(h):
                 for x in range(w):
                     # Create a simple pattern
                     if (x // 4 + y // 2) % 2 == 0:
-                        if cycle == 0:
-                            color = graphics.create_pen(255, 0, 0)  # Red
-                        elif cycle == 1:
-                            color = graphics.create_pen(0, 255, 0)  # Green
-                        else:
-                            color = graphics.create_pen(0, 0, 255)  # Blue
-                    else:
-                        color = BLACK
-                    
-                    graphics.set_pen(color)
-                    graphics.pixel(x, y)
+                        fb.set_pixel(x, y, r, g, b)
             
-            picounicorn.update(graphics)
-            time.sleep(0.02)
+            yield
         
         # Quick transition to complementary
         for frame in range(transition_frames):
             brightness = int(255 * (1 - frame / transition_frames))
+            if cycle == 0:
+                r, g, b = 0, brightness, brightness  # Cyan
+            elif cycle == 1:
+                r, g, b = brightness, 0, brightness  # Magenta
+            else:
+                r, g, b = brightness, brightness, 0  # Yellow
             
+            fb.clear()
             for y in range(h):
                 for x in range(w):
                     # Invert the pattern with complementary color
                     if (x // 4 + y // 2) % 2 == 1:  # Inverted
-                        if cycle == 0:
-                            color = graphics.create_pen(0, brightness, brightness)  # Cyan
-                        elif cycle == 1:
-                            color = graphics.create_pen(brightness, 0, brightness)  # Magenta
-                        else:
-                            color = graphics.create_pen(brightness, brightness, 0)  # Yellow
-                    else:
-                        color = BLACK
-                    
-                    graphics.set_pen(color)
-                    graphics.pixel(x, y)
+                        fb.set_pixel(x, y, r, g, b)
             
-            picounicorn.update(graphics)
-
-# Helper function
-def hsv_to_rgb(h, s, v):
-    i = int(h * 6.0)
-    f = (h * 6.0) - i
-    p = v * (1.0 - s)
-    q = v * (1.0 - s * f)
-    t = v * (1.0 - s * (1.0 - f))
-    i = i % 6
-    
-    if i == 0:
-        return int(v * 255), int(t * 255), int(p * 255)
-    elif i == 1:
-        return int(q * 255), int(v * 255), int(p * 255)
-    elif i == 2:
-        return int(p * 255), int(v * 255), int(t * 255)
-    elif i == 3:
-        return int(p * 255), int(q * 255), int(v * 255)
-    elif i == 4:
-        return int(t * 255), int(p * 255), int(v * 255)
-    else:
-        return int(v * 255), int(p * 255), int(q * 255)
-
-# Main showcase loop
-print("Temporal Color Mixing & Persistence of Vision!")
-print("These effects exploit your visual system!")
+            yield
 
+# (name, effect, frames per second) - None runs as fast as possible
 effects = [
-    ("Subpixel Shimmer", subpixel_shimmer),
-    ("Chromatic Aberration", chromatic_aberration),
-    ("Interlaced Waves", interlaced_waves),
-    ("Phase-Shifted Cycling", phase_cycling),
-    ("Persistence Trails", persistence_trails),
-    ("Quantum Superposition", quantum_superposition),
-    ("Afterimage Effect", afterimage_effect),
+    ("Subpixel Shimmer", subpixel_shimmer, None),
+    ("Chromatic Aberration", chromatic_aberration, None),
+    ("Interlaced Waves", interlaced_waves, None),
+    ("Phase-Shifted Cycling", phase_cycling, None),
+    ("Persistence Trails", persistence_trails, None),
+    ("Quantum Superposition", quantum_superposition, None),
+    ("Afterimage Effect", afterimage_effect, 50),
 ]
 
-current = 0
+def skip(runner):
+    runner.next()
 
-while True:
-    # Button handling
-    if picounicorn.is_pressed(picounicorn.BUTTON_A):
-        current = (current + 1) % len(effects)
-        time.sleep(0.2)
-    
-    # Run current effect
-    name, func = effects[current]
-    print(f"Running: {name}")
-    func()
-    
-    # Auto advance
-    current = (current + 1) % len(effects)
+def dimmer(runner):
+    runner.set_brightness(max(0.1, runner.brightness * 0.8))
+
+def brighter(runner):
+    runner.set_brightness(runner.brightness * 1.25)
+
+buttons = {
+    PicoUnicorn.BUTTON_A: skip,
+    PicoUnicorn.BUTTON_X: dimmer,
+    PicoUnicorn.BUTTON_Y: brighter,
+}
+
+# Main showcase loop
+def main():
+    print("Temporal Color Mixing & Persistence of Vision!")
+    print("These effects exploit your visual system!")
+    print("A: Skip | X: Dimmer | Y: Brighter")
+
+    # The math-heavy effects are computed on core 1 while core 0 displays
+    DualCoreRunner(picounicorn, graphics, fb, effects, buttons).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Double-buffered frame loop that computes on core 1 and displays on core 0.
+
+    DualCoreRunner(picounicorn, graphics, fb, effects, buttons).run()
+
+Core 1 (a _thread) steps the effect into fb as soon as the previous frame has
+been handed over, so frame N+1 is being computed while core 0 pushes frame N
+and runs picounicorn.update. A finished frame is copied into the back buffer
+and ownership passes to core 0 under a lock; core 0 swaps it into the
+display buffer without copying. Core 0 also polls the buttons and keeps the
+scheduler, telling core 1 how many extra steps to simulate when it falls
+behind.
+
+Everything that touches the playlist or the scheduler happens on core 0.
+When an effect finishes, core 1 only raises a flag under the lock and waits;
+core 0 selects the next effect. An exception in an effect is caught on
+core 1 and raised again on core 0, so it stops the runner instead of
+leaving core 0 waiting for frames that will never come.
+
+Effects still draw into the one fb they always used, so effects that rely on
+last frame's pixels (interlaced_waves) behave as before. CPython has _thread
+too, so the same pipeline runs on the host emulator with real threads.
+"""
+import _thread
+import time
+
+from framebuffer import FrameBuffer
+from runner import Runner
+
+
+class DualCoreRunner(Runner):
+    def __init__(self, picounicorn, graphics, fb, effects, buttons=None):
+        Runner.__init__(self, picounicorn, graphics, fb, effects, buttons)
+        self.lock = _thread.allocate_lock()
+        self.out = FrameBuffer(fb.width, fb.height)
+        self.out.set_brightness(fb.brightness, fb.gamma)
+        self.back = bytearray(len(fb.buf))
+        self.full = False
+        self.running = False
+        self.skip = 0
+        self.late = 0
+        self.finished = False
+        self.error = None
+        self.compute_us = -1
+        self._pending = None
+
+    def start(self, effect):
+        # Only core 1 touches the effect's generator
+        with self.lock:
+            self._pending = effect
+
+    def _take_pending(self):
+        with self.lock:
+            effect = self._pending
+            self._pending = None
+        if effect is not None:
+            self.frames = effect()
+
+    def advance(self):
+        """Core 1: step the effect; False if there is no frame to show"""
+        self._take_pending()
+        if self.frames is None:
+            return False
+        try:
+            next(self.frames)
+        except StopIteration:
+            # Core 0 picks the next effect; wait for it in _take_pending
+            self.frames = None
+            with self.lock:
+                self.finished = True
+            return False
+        self.frame += 1
+        return True
+
+    def set_brightness(self, level):
+        # out is the buffer that gets pushed, and only core 0 touches it
+        self.out.set_brightness(level)
+        self.brightness = self.out.brightness
+        # fb is never pushed, but effects that dither toward the output
+        # read the table off it
+        self.fb.set_brightness(level)
+
+    def compute(self):
+        """Core 1: simulate frames and hand each one to core 0"""
+        try:
+            self._compute()
+        except Exception as e:
+            with self.lock:
+                self.error = e
+
+    def _compute(self):
+        while self.running:
+            with self.lock:
+                steps = 1 + self.skip
+                self.skip = 0
+            compute_us = -1
+            if not self.paused:
+                telemetry = self.telemetry
+                if telemetry:
+                    started = time.ticks_us()
+                drawn = False
+                for _ in range(steps):
+                    if not self.advance():
+                        break
+                    drawn = True
+                if not drawn:
+                    # Finished, and the next effect isn't there yet
+                    time.sleep_ms(1)
+                    continue
+                if telemetry:
+                    compute_us = time.ticks_diff(time.ticks_us(), started)
+            # Wait for core 0 to take the previous frame
+            while self.full and self.running:
+                time.sleep_ms(0)
+            with self.lock:
+                self.back[:] = self.fb.buf
+                self.full = True
+                # Telemetry is only touched on core 0; the time goes with the frame
+                self.compute_us = compute_us
+
+    def present(self):
+        """Core 0: show the newest finished frame, if core 1 has one"""
+        with self.lock:
+            if not self.full:
+                return False
+            self.out.buf, self.back = self.back, self.out.buf
+            self.full = False
+            compute_us = self.compute_us
+        telemetry = self.telemetry
+        if telemetry:
+            if compute_us >= 0:
+                telemetry.compute(compute_us)
+            started = time.ticks_us()
+        self.out.push(self.graphics)
+        self.picounicorn.update(self.graphics)
+        if telemetry:
+            telemetry.push(time.ticks_diff(time.ticks_us(), started))
+        self.collect()
+        return True
+
+    def sync(self):
+        """Core 0: act on what core 1 reported since the last frame"""
+        with self.lock:
+            finished = self.finished
+            self.finished = False
+            error = self.error
+        if error is not None:
+            raise error
+        if finished:
+            self.next()
+            return True
+        return False
+
+    def step(self):
+        self.poll()
+        self.sync()
+        if self.scheduler.fps is None:
+            # Unpaced effects show every frame as soon as it is ready
+            while not self.present():
+                if self.sync():
+                    return
+                time.sleep_ms(0)
+            return
+        steps = self.scheduler.due()
+        if not steps:
+            return
+        if steps > 1:
+            with self.lock:
+                self.skip += steps - 1
+        if not self.present():
+            # Core 1 didn't finish in time; the last frame stays up
+            self.late += 1
+
+    def run(self):
+        if self.frames is None and self._pending is None:
+            self.select(self.index)
+        self.running = True
+        _thread.start_new_thread(self.compute, ())
+        try:
+            while True:
+                self.step()
+                self.scheduler.wait()
+        finally:
+            self.running = False
@@ -0,0 +1,273 @@
+"""Host-side stand-in for the Pimoroni picounicorn/picographics modules.
+
+Install it before importing one of the demo scripts and they run on a normal
+Python interpreter instead of a Pico:
+
+    import emulator
+    emulator.install()
+    import claude_demo
+
+Both modules are served by this file. The graphics object keeps its pixels in
+the same RGB888 layout PicoGraphics uses on the device, and counts the calls
+made into it so the benchmark runner can report them.
+
+install(virtual_clock=True) swaps wall-clock time for a virtual clock that
+only moves when something sleeps or calls advance(), so runs that depend on
+ticks_ms (the scheduler) repeat exactly. asyncio gets an event loop on the
+same clock: when every task is asleep it jumps straight to the next wake-up
+instead of waiting, so AsyncRunner paces on virtual time too.
+"""
+import math
+import selectors
+import sys
+import time
+
+DISPLAY_UNICORN_PACK = 14
+PEN_RGB888 = 6
+
+WIDTH = 16
+HEIGHT = 7
+
+
+class FrameLimit(Exception):
+    """Raised by PicoUnicorn.update once frame_limit frames have been shown"""
+
+
+def pack_rgb(r, g, b):
+    return ((r & 0xFF) << 16) | ((g & 0xFF) << 8) | (b & 0xFF)
+
+
+def hsv_to_rgb(h, s, v):
+    """Float HSV (0..1) to 8-bit RGB, rounding like the firmware does"""
+    i = int(h * 6.0)
+    f = (h * 6.0) - i
+    v = v * 255.0
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+    if i == 0:
+        r, g, b = v, t, p
+    elif i == 1:
+        r, g, b = q, v, p
+    elif i == 2:
+        r, g, b = p, v, t
+    elif i == 3:
+        r, g, b = p, q, v
+    elif i == 4:
+        r, g, b = t, p, v
+    else:
+        r, g, b = v, p, q
+    return int(r), int(g), int(b)
+
+
+class PicoGraphics(bytearray):
+    """RGB888 canvas: one little-endian 0x00RRGGBB word per pixel"""
+
+    def __new__(cls, display=DISPLAY_UNICORN_PACK, **kwargs):
+        return bytearray.__new__(cls)
+
+    def __init__(self, display=DISPLAY_UNICORN_PACK, **kwargs):
+        bytearray.__init__(self, WIDTH * HEIGHT * 4)
+        self.width = WIDTH
+        self.height = HEIGHT
+        self.pen = 0
+        self.calls = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.calls = {"create_pen": 0, "create_pen_hsv": 0, "set_pen": 0,
+                      "pixel": 0, "clear": 0}
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def create_pen(self, r, g, b):
+        self.calls["create_pen"] += 1
+        return pack_rgb(int(r), int(g), int(b))
+
+    def create_pen_hsv(self, h, s, v):
+        self.calls["create_pen_hsv"] += 1
+        return pack_rgb(*hsv_to_rgb(h, s, v))
+
+    def set_pen(self, pen):
+        self.calls["set_pen"] += 1
+        self.pen = pen
+
+    def pixel(self, x, y):
+        self.calls["pixel"] += 1
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = (y * self.width + x) * 4
+            pen = self.pen
+            self[i] = pen & 0xFF
+            self[i + 1] = (pen >> 8) & 0xFF
+            self[i + 2] = (pen >> 16) & 0xFF
+            self[i + 3] = 0
+
+    def clear(self):
+        self.calls["clear"] += 1
+        pen = self.pen
+        self[:] = bytes((pen & 0xFF, (pen >> 8) & 0xFF, (pen >> 16) & 0xFF, 0)) * (self.width * self.height)
+
+    def rgb(self):
+        """Current canvas as packed RGB bytes, row-major"""
+        out = bytearray(self.width * self.height * 3)
+        out[0::3] = self[2::4]
+        out[1::3] = self[1::4]
+        out[2::3] = self[0::4]
+        return bytes(out)
+
+
+class PicoUnicorn:
+    BUTTON_A = 12
+    BUTTON_B = 13
+    BUTTON_X = 14
+    BUTTON_Y = 15
+
+    def __init__(self):
+        self.updates = 0
+        self.frame_limit = None
+        self.record = 0
+        self.frames = []
+        self.frame_times = []
+        self.pressed = set()
+        self._last = time.perf_counter()
+
+    def get_width(self):
+        return WIDTH
+
+    def get_height(self):
+        return HEIGHT
+
+    def is_pressed(self, button):
+        return button in self.pressed
+
+    def mark(self):
+        """Start timing the next frame from now"""
+        self._last = time.perf_counter()
+        self.frame_times = []
+
+    def update(self, graphics):
+        now = time.perf_counter()
+        self.frame_times.append(now - self._last)
+        self._last = now
+        self.updates += 1
+        if self.record:
+            self.frames.append(graphics.rgb())
+            if len(self.frames) > self.record:
+                del self.frames[0]
+        if self.frame_limit is not None and self.updates >= self.frame_limit:
+            raise FrameLimit()
+
+
+TICKS_PERIOD = 1 << 30
+
+# Microseconds on the virtual clock, or None for wall-clock time
+_clock = None
+
+
+def _now_us():
+    if _clock is not None:
+        return _clock
+    return int(time.perf_counter() * 1000000)
+
+
+def advance(ms):
+    """Move the virtual clock on"""
+    global _clock
+    _clock += int(ms * 1000)
+
+
+def ticks_ms():
+    return (_now_us() // 1000) & (TICKS_PERIOD - 1)
+
+
+def ticks_us():
+    return _now_us() & (TICKS_PERIOD - 1)
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & (TICKS_PERIOD - 1)
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & (TICKS_PERIOD - 1)
+    if diff >= TICKS_PERIOD // 2:
+        diff -= TICKS_PERIOD
+    return diff
+
+
+def sleep_ms(ms):
+    _sleep(ms / 1000)
+
+
+def sleep_us(us):
+    _sleep(us / 1000000)
+
+
+_real_sleep = time.sleep
+_sleep = _real_sleep
+
+
+def _no_sleep(seconds):
+    # Still give other threads (the dual-core pipeline) a turn
+    _real_sleep(0)
+
+
+def _virtual_sleep(seconds):
+    advance(seconds * 1000)
+    _real_sleep(0)
+
+
+class _VirtualSelector(selectors.SelectSelector):
+    def select(self, timeout=None):
+        # Nothing on the host is worth waiting for; skip to the next timer
+        global _clock
+        if timeout:
+            _clock += math.ceil(timeout * 1000000)
+        return selectors.SelectSelector.select(self, 0)
+
+
+def _virtual_loop():
+    import asyncio
+
+    class VirtualClockLoop(asyncio.SelectorEventLoop):
+        def __init__(self):
+            asyncio.SelectorEventLoop.__init__(self, _VirtualSelector())
+
+        def time(self):
+            return _clock / 1000000
+
+    class VirtualClockPolicy(asyncio.DefaultEventLoopPolicy):
+        def new_event_loop(self):
+            return VirtualClockLoop()
+
+    asyncio.set_event_loop_policy(VirtualClockPolicy())
+
+
+def install(width=16, height=7, realtime=False, virtual_clock=False):
+    """Register this module as picounicorn and picographics.
+
+    The MicroPython extensions to time (ticks_ms, ticks_diff, sleep_ms, ...)
+    are added to the host time module. With realtime=False every sleep
+    becomes a no-op so effects run flat out; with virtual_clock=True it moves
+    the virtual clock on instead, starting from 0, and asyncio.run() uses a
+    loop on the same clock.
+    """
+    global WIDTH, HEIGHT, _sleep, _clock
+    WIDTH = width
+    HEIGHT = height
+    module = sys.modules[__name__]
+    sys.modules["picounicorn"] = module
+    sys.modules["picographics"] = module
+    for name in ("ticks_ms", "ticks_us", "ticks_add", "ticks_diff", "sleep_ms", "sleep_us"):
+        if not hasattr(time, name):
+            setattr(time, name, getattr(module, name))
+    if virtual_clock:
+        _clock = 0
+        _sleep = _virtual_sleep
+        time.sleep = _virtual_sleep
+        _virtual_loop()
+    elif not realtime:
+        _sleep = _no_sleep
+        time.sleep = _no_sleep
@@ -0,0 +1,152 @@
+"""Doom-style fire on a flat heat buffer.
+
+    fire = Fire(w, h)
+    while True:
+        fire.step()
+        fire.draw(fb.buf)
+        yield
+
+Heat is one bytearray, row-major like fb.buf, holding palette indexes. Each
+step seeds the bottom row with sparks and spreads heat upwards, every cell
+averaging the cells below it and cooling by a random amount. The random
+sparks and cooling values are drawn once into 256-entry rings; a step only
+picks a new starting point in each ring, so there is no random call per cell.
+
+The palette is flat RGB bytes with up to 256 entries; gradient() builds one
+from a few colour stops. Cooling defaults to a rate that lets the hottest
+colour fade out over the height of the canvas, so the flames fill any canvas
+size with any palette size.
+"""
+import random
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+RING = 256
+
+
+def gradient(stops, size):
+    """Palette of size colours blended evenly between (r, g, b) stops"""
+    out = bytearray(size * 3)
+    last = len(stops) - 1
+    for i in range(size):
+        pos = i * last / (size - 1)
+        k = min(int(pos), last - 1)
+        f = pos - k
+        a = stops[k]
+        b = stops[k + 1]
+        for c in range(3):
+            out[i * 3 + c] = int(a[c] + (b[c] - a[c]) * f)
+    return bytes(out)
+
+
+# The classic black-red-orange-yellow-white ramp
+DOOM = gradient((
+    (0, 0, 0),
+    (50, 0, 0),
+    (100, 0, 0),
+    (200, 50, 0),
+    (255, 100, 0),
+    (255, 200, 0),
+    (255, 255, 100),
+), 36)
+
+
+if micropython:
+    # Viper functions take at most four arguments on older firmware, so
+    # the buffers and size are read off the Fire
+    @micropython.viper
+    def _spread(fire, pos: int):
+        heat = ptr8(fire.heat)
+        cool = ptr8(fire.cool)
+        w = int(fire.w)
+        h = int(fire.h)
+        # Bottom-up, so heat reaches the top the frame it is seeded
+        y = h - 2
+        while y >= 0:
+            row = y * w
+            below = row + w
+            x = 0
+            while x < w:
+                b = heat[below + x]
+                left = b
+                right = b
+                if x > 0:
+                    left = heat[below + x - 1]
+                if x < w - 1:
+                    right = heat[below + x + 1]
+                v = ((b + b + left + right) >> 2) - cool[(pos + row + x) & 255]
+                if v < 0:
+                    v = 0
+                heat[row + x] = v
+                x += 1
+            y -= 1
+
+    @micropython.viper
+    def _render(heat: ptr8, palette: ptr8, buf: ptr8, n: int):
+        i = 0
+        j = 0
+        while i < n:
+            k = heat[i] * 3
+            buf[j] = palette[k]
+            buf[j + 1] = palette[k + 1]
+            buf[j + 2] = palette[k + 2]
+            i += 1
+            j += 3
+else:
+    def _spread(fire, pos):
+        heat = fire.heat
+        cool = fire.cool
+        w = fire.w
+        h = fire.h
+        for y in range(h - 2, -1, -1):
+            row = y * w
+            below = row + w
+            for x in range(w):
+                b = heat[below + x]
+                left = heat[below + x - 1] if x > 0 else b
+                right = heat[below + x + 1] if x < w - 1 else b
+                v = ((b + b + left + right) >> 2) - cool[(pos + row + x) & 255]
+                heat[row + x] = v if v > 0 else 0
+
+    def _render(heat, palette, buf, n):
+        # Each channel is a byte translation of the heat buffer
+        buf[0:n * 3:3] = heat.translate(palette[0::3])
+        buf[1:n * 3:3] = heat.translate(palette[1::3])
+        buf[2:n * 3:3] = heat.translate(palette[2::3])
+
+
+class Fire:
+    def __init__(self, w, h, palette=DOOM, cooling=None):
+        self.w = w
+        self.h = h
+        self.heat = bytearray(w * h)
+        self.palette = palette
+        self.levels = len(palette) // 3
+        top = self.levels - 1
+        if cooling is None:
+            # Averages out at top / h per row
+            cooling = max(1, 2 * top // h)
+        self.cooling = cooling
+        self.sparks = bytearray(random.randint(0, top) for _ in range(RING))
+        self.cool = bytearray(random.randint(0, cooling) for _ in range(RING))
+        if micropython is None:
+            # translate() wants a full 256-entry table per channel
+            self.palette = bytes(palette) + bytes(768 - len(palette))
+
+    def step(self):
+        """Seed the bottom row and spread the heat up one frame"""
+        w = self.w
+        heat = self.heat
+        sparks = self.sparks
+        start = (self.h - 1) * w
+        pos = random.getrandbits(8)
+        for x in range(w):
+            heat[start + x] = sparks[(pos + x) & 255]
+        _spread(self, random.getrandbits(8))
+
+    def draw(self, buf):
+        """Colour a w*h*3 RGB buffer from the heat"""
+        _render(self.heat, self.palette, buf, len(self.heat))
@@ -0,0 +1,245 @@
+"""Flat RGB framebuffer that effects draw into, pushed to the display once.
+
+    fb = FrameBuffer(w, h)
+    fb.set_pixel(3, 2, 255, 0, 0)
+    fb.push(graphics)
+    picounicorn.update(graphics)
+
+Pixels live in one bytearray, three bytes per pixel in row-major order, so a
+full-screen effect can write fb.buf directly with a running index instead of
+making set_pen/pixel calls.
+
+push() copies straight into the PicoGraphics framebuffer when it exposes one
+(memoryview(graphics) on an RGB888 canvas, which is what the Unicorn pack and
+the host emulator use). Anything else falls back to set_pen/pixel through a
+PenCache.
+
+The buffer remembers what it last pushed and only writes the pixels that
+changed since then. fb.changed is the number of pixels written by the last
+push and fb.total_changed keeps a running count.
+
+Every value goes through a 256-entry table on its way out, so effects draw
+in linear 0-255 and one set_brightness(level, gamma) call dims and gamma
+corrects everything. The table is only rebuilt when the setting changes,
+which also forces a full push.
+"""
+from pens import PenCache
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+
+# Pixels compared per span on CPython before looking at single pixels
+SPAN = 16
+
+# Gamma that makes linear values look even on the Unicorn's LEDs
+GAMMA = 2.2
+
+IDENTITY = bytes(range(256))
+
+
+def gamma_table(brightness=1.0, gamma=GAMMA):
+    """Output level for every 8-bit input at a brightness of 0..1"""
+    if brightness >= 1 and gamma == 1:
+        return IDENTITY
+    return bytes(int((i / 255) ** gamma * brightness * 255 + 0.5) for i in range(256))
+
+
+if micropython:
+    @micropython.viper
+    def _blit_rgb888(src: ptr8, dst: ptr8, n: int, lut: ptr8):
+        i = 0
+        j = 0
+        while i < n:
+            dst[j] = lut[src[i + 2]]
+            dst[j + 1] = lut[src[i + 1]]
+            dst[j + 2] = lut[src[i]]
+            i += 3
+            j += 4
+
+    @micropython.viper
+    def _fill_rgb(buf, r: int, g: int, b: int):
+        # A ptr8 argument has no length, so cast after taking it
+        n = int(len(buf))
+        dst = ptr8(buf)
+        i = 0
+        while i < n:
+            dst[i] = r
+            dst[i + 1] = g
+            dst[i + 2] = b
+            i += 3
+
+    # Viper functions take at most four arguments on older firmware, so
+    # this one reads the buffers and table off the FrameBuffer
+    @micropython.viper
+    def _blit_dirty(fb, dst: ptr8) -> int:
+        src = ptr8(fb.buf)
+        prev = ptr8(fb.prev)
+        lut = ptr8(fb.lut)
+        n = int(len(fb.buf))
+        changed = 0
+        i = 0
+        j = 0
+        while i < n:
+            r = src[i]
+            g = src[i + 1]
+            b = src[i + 2]
+            if r != prev[i] or g != prev[i + 1] or b != prev[i + 2]:
+                prev[i] = r
+                prev[i + 1] = g
+                prev[i + 2] = b
+                dst[j] = lut[b]
+                dst[j + 1] = lut[g]
+                dst[j + 2] = lut[r]
+                changed += 1
+            i += 3
+            j += 4
+        return changed
+else:
+    def _fill_rgb(buf, r, g, b):
+        buf[:] = bytes((r, g, b)) * (len(buf) // 3)
+
+    def _blit_rgb888(src, dst, n, lut):
+        # Strided slice copies and translate() run in C on CPython
+        dst[0::4] = src[2:n:3].translate(lut)
+        dst[1::4] = src[1:n:3].translate(lut)
+        dst[2::4] = src[0:n:3].translate(lut)
+
+    def _blit_dirty(fb, dst):
+        src = fb.buf
+        prev = fb.prev
+        lut = fb.lut
+        n = len(src)
+        changed = 0
+        span = SPAN * 3
+        for a in range(0, n, span):
+            b = min(n, a + span)
+            # Whole-span compare runs in C; most spans are unchanged
+            if src[a:b] == prev[a:b]:
+                continue
+            for i in range(a, b, 3):
+                if src[i] != prev[i] or src[i + 1] != prev[i + 1] or src[i + 2] != prev[i + 2]:
+                    j = i // 3 * 4
+                    dst[j] = lut[src[i + 2]]
+                    dst[j + 1] = lut[src[i + 1]]
+                    dst[j + 2] = lut[src[i]]
+                    changed += 1
+            prev[a:b] = src[a:b]
+        return changed
+
+
+def native_buffer(graphics, w, h):
+    """Writable RGB888 view of the graphics framebuffer, or None"""
+    try:
+        mv = memoryview(graphics)
+    except TypeError:
+        return None
+    if len(mv) != w * h * 4:
+        return None
+    return mv
+
+
+class FrameBuffer:
+    def __init__(self, w, h):
+        self.width = w
+        self.height = h
+        self.buf = bytearray(w * h * 3)
+        self.prev = bytearray(w * h * 3)
+        self.changed = 0
+        self.total_changed = 0
+        self.brightness = 1.0
+        self.gamma = 1.0
+        self.lut = IDENTITY
+        self._target = None
+        self._native = None
+        self._pens = None
+
+    def clear(self):
+        _fill_rgb(self.buf, 0, 0, 0)
+
+    def fill(self, r, g, b):
+        _fill_rgb(self.buf, r, g, b)
+
+    def set_pixel(self, x, y, r, g, b):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = (y * self.width + x) * 3
+            buf = self.buf
+            buf[i] = r
+            buf[i + 1] = g
+            buf[i + 2] = b
+
+    def get_pixel(self, x, y):
+        i = (y * self.width + x) * 3
+        return self.buf[i], self.buf[i + 1], self.buf[i + 2]
+
+    def _bind(self, graphics):
+        self._target = graphics
+        self._native = native_buffer(graphics, self.width, self.height)
+        if self._native is None and self._pens is None:
+            self._pens = PenCache(graphics)
+
+    def set_brightness(self, brightness, gamma=None):
+        """Scale everything pushed by brightness (0..1), gamma corrected"""
+        if gamma is None:
+            gamma = self.gamma
+        brightness = min(1.0, max(0.0, brightness))
+        if brightness == self.brightness and gamma == self.gamma:
+            return
+        self.brightness = brightness
+        self.gamma = gamma
+        self.lut = gamma_table(brightness, gamma)
+        self.invalidate()
+
+    def invalidate(self):
+        """Make the next push write every pixel"""
+        self._target = None
+
+    def push(self, graphics):
+        """Write the changed pixels into graphics ready for picounicorn.update"""
+        buf = self.buf
+        n = len(buf)
+        if graphics is not self._target:
+            # Nothing is known about what the display shows yet
+            self._bind(graphics)
+            self.prev[:] = buf
+            if self._native is not None:
+                _blit_rgb888(buf, self._native, n, self.lut)
+            else:
+                self._push_pens(graphics, None)
+            changed = n // 3
+        elif self._native is not None:
+            changed = _blit_dirty(self, self._native)
+        else:
+            changed = self._push_pens(graphics, self.prev)
+        self.changed = changed
+        self.total_changed += changed
+        return changed
+
+    def _push_pens(self, graphics, prev):
+        buf = self.buf
+        rgb = self._pens.rgb
+        lut = self.lut
+        w = self.width
+        changed = 0
+        last = None
+        i = 0
+        for y in range(self.height):
+            for x in range(w):
+                r = buf[i]
+                g = buf[i + 1]
+                b = buf[i + 2]
+                if prev is None or r != prev[i] or g != prev[i + 1] or b != prev[i + 2]:
+                    pen = rgb(lut[r], lut[g], lut[b])
+                    if pen != last:
+                        graphics.set_pen(pen)
+                        last = pen
+                    graphics.pixel(x, y)
+                    if prev is not None:
+                        prev[i] = r
+                        prev[i + 1] = g
+                        prev[i + 2] = b
+                    changed += 1
+                i += 3
+        return changed
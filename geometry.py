@@ -0,0 +1,75 @@
+"""Radial and polar maps of the canvas, built once per canvas size.
+
+    g = geometry(w, h)
+    d = g.dist[y * w + x]
+
+Each map is a flat row-major list with one value per pixel:
+
+- dist: distance from the centre (w/2, h/2) in pixels
+- angle: math.atan2 of the offset from the centre, -pi..pi
+- u, v: x and y scaled to -1..1 across the canvas
+
+geometry() keeps one Geometry per (w, h), so effects that want radial or
+polar patterns share the same maps and pay for the square roots once.
+
+shift() resamples a map at a fractional offset from every pixel, blending
+the four neighbouring cells. The offset is the same for every pixel, so the
+blend weights are worked out once per call.
+"""
+import math
+
+_cache = {}
+
+
+class Geometry:
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.dist = []
+        self.angle = []
+        self.u = []
+        self.v = []
+        for y in range(h):
+            cy = y - h / 2
+            for x in range(w):
+                cx = x - w / 2
+                self.dist.append(math.sqrt(cx * cx + cy * cy))
+                self.angle.append(math.atan2(cy, cx))
+                self.u.append(2 * x / (w - 1) - 1 if w > 1 else 0.0)
+                self.v.append(2 * y / (h - 1) - 1 if h > 1 else 0.0)
+
+    def shift(self, values, dx, dy, out):
+        """Fill out with values sampled at (x + dx, y + dy), clamped to the edges"""
+        w = self.w
+        h = self.h
+        fx = math.floor(dx)
+        fy = math.floor(dy)
+        ax = dx - fx
+        ay = dy - fy
+        # Corner weights, the same for every pixel
+        w00 = (1 - ax) * (1 - ay)
+        w10 = ax * (1 - ay)
+        w01 = (1 - ax) * ay
+        w11 = ax * ay
+        cols0 = [min(max(x + fx, 0), w - 1) for x in range(w)]
+        cols1 = [min(max(x + fx + 1, 0), w - 1) for x in range(w)]
+        i = 0
+        for y in range(h):
+            row0 = min(max(y + fy, 0), h - 1) * w
+            row1 = min(max(y + fy + 1, 0), h - 1) * w
+            for x in range(w):
+                x0 = cols0[x]
+                x1 = cols1[x]
+                out[i] = (values[row0 + x0] * w00 + values[row0 + x1] * w10 +
+                          values[row1 + x0] * w01 + values[row1 + x1] * w11)
+                i += 1
+        return out
+
+
+def geometry(w, h):
+    """The shared Geometry for a w x h canvas"""
+    g = _cache.get((w, h))
+    if g is None:
+        g = Geometry(w, h)
+        _cache[(w, h)] = g
+    return g
@@ -0,0 +1,782 @@
+"""Golden-frame regression suite, run on the host emulator.
+
+    python golden.py             # check everything
+    python golden.py --update    # re-record golden/*.json after a deliberate change
+    python golden.py -k push     # only checks whose name contains "push"
+
+Every effect is played by a Runner at its playlist fps, from a cleared
+framebuffer with random seeded to SEED and the emulator on a virtual clock,
+and the SHA-1 of fb.buf is taken as each of FRAMES is shown.
+golden/<script>.json holds the recorded hashes, so a change that alters
+what an effect looks like fails here even if it looks plausible. The
+pacing checks run Runner and AsyncRunner through deliberate overruns on the
+same clock and check which frames are shown and how much time passes.
+
+The remaining checks hold each fast path to a plain reference loop written
+out below: the framebuffer blits and brightness table against the
+set_pen/pixel fallback, the decay/hsv/oscillator/dither/fire/sprite/particle
+kernels, clip playback and the numpy renderer. Most must match exactly;
+the few that approximate floating point declare a tolerance (TOLERANCE).
+
+Those checks run the CPython fallbacks. viper_kernels loads each kernel
+module again with a stand-in micropython whose viper decorator runs the
+function body as Python. ptr8/ptr16/ptr32 shims truncate stores and refuse
+out-of-range indices. Every viper body has to match its fallback on the
+same input. This is still not the Pico: nothing here checks viper's
+compiler (types, the four-argument limit) or 32-bit integer wrap-around.
+It also doesn't cover MicroPython-only calls such as clip's
+readinto(buf, n), single-precision floats, or uasyncio and _thread on
+real cores.
+"""
+import argparse
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import types
+from array import array
+
+import emulator
+
+emulator.install(virtual_clock=True)
+
+from aiorunner import AsyncRunner
+from bench import SCRIPTS, effects_of
+from record import fps_of
+from runner import Runner
+import clip
+import decay
+import dither
+import fire
+import framebuffer
+import hsv
+import oscillators
+import particles
+import sprites
+from framebuffer import FrameBuffer, GAMMA
+
+SEED = 1234
+FRAMES = (0, 1, 2, 5, 10, 25, 50, 100, 199)
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# Largest allowed difference per channel where a kernel approximates floats
+TOLERANCE = {
+    "hsv": 2,          # integer hue ramps against emulator.hsv_to_rgb
+    "sine": 1,         # oscillators.SINE against (sin + 1) * 127
+    "render16": 4,     # interpolated 8.8 sine against the table entry below it
+}
+
+CHECKS = []
+
+
+def check(fn):
+    CHECKS.append(fn)
+    return fn
+
+
+def digest(buf):
+    return hashlib.sha1(bytes(buf)).hexdigest()
+
+
+class Finished(Exception):
+    """The captured effect ended"""
+
+
+def capturing(base):
+    """A runner class that keeps fb.buf as each frame is shown and stops
+    when its effect ends"""
+    class Capture(base):
+        shown = None
+
+        def show(self):
+            if self.shown is None:
+                self.shown = []
+            self.shown.append(bytes(self.fb.buf))
+            base.show(self)
+
+        def next(self):
+            raise Finished()
+
+    return Capture
+
+
+CaptureRunner = capturing(Runner)
+CaptureAsyncRunner = capturing(AsyncRunner)
+
+
+def play(runner, last):
+    """Step a capturing Runner until frame `last` is shown or the effect ends"""
+    # Runner prints the effect it starts
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            while not runner.shown or len(runner.shown) <= last:
+                runner.step()
+                runner.scheduler.wait()
+        except Finished:
+            pass
+    return runner.shown[:last + 1]
+
+
+def run(module, func, last=FRAMES[-1], fps=None):
+    """fb.buf as a Runner shows each frame up to `last`, fewer if the effect ends"""
+    random.seed(SEED)
+    module.fb.clear()
+    runner = CaptureRunner(module.picounicorn, module.graphics, module.fb,
+                           [(func.__name__, func, fps)])
+    return play(runner, last)
+
+
+def hashes(module, func):
+    frames = run(module, func, fps=fps_of(module, func.__name__))
+    return {str(i): digest(frames[i]) for i in FRAMES if i < len(frames)}
+
+
+def golden_file(script):
+    return os.path.join(GOLDEN, script + ".json")
+
+
+def record(script):
+    module = importlib.import_module(script)
+    table = {name: hashes(module, func) for name, func in effects_of(module)}
+    os.makedirs(GOLDEN, exist_ok=True)
+    with open(golden_file(script), "w") as f:
+        json.dump(table, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def _golden_check(script):
+    def golden():
+        with open(golden_file(script)) as f:
+            table = json.load(f)
+        module = importlib.import_module(script)
+        failures = []
+        for name, func in effects_of(module):
+            got = hashes(module, func)
+            want = table.get(name)
+            if want is None:
+                failures.append("%s has no golden frames (run --update)" % name)
+                continue
+            for frame in sorted(want, key=int):
+                if got.get(frame) != want[frame]:
+                    failures.append("%s differs from frame %s" % (name, frame))
+                    break
+        return failures
+    golden.__name__ = "golden_" + script
+    return golden
+
+
+for _script in SCRIPTS:
+    check(_golden_check(_script))
+
+
+# Pacing
+
+# Frame of the counter effect -> virtual ms it overruns by, at PACING_FPS
+OVERRUNS = {10: 50, 30: 200}
+PACING_FPS = 50
+PACING_FRAMES = 60
+# 50 ms is 2.5 frames: one step is caught up without being shown. 200 ms is
+# 10 frames: capped at max_steps (4), the other 6 are dropped from the timeline
+PACING_SHOWN = [n for n in range(PACING_FRAMES) if n != 11 and not 31 <= n <= 33]
+PACING_MISSED = 1 + 9
+PACING_MS = (PACING_FRAMES + 6) * 1000 // PACING_FPS
+
+
+def _counter(fb):
+    def counter():
+        for n in range(PACING_FRAMES):
+            fb.buf[0] = n
+            emulator.advance(OVERRUNS.get(n, 0))
+            yield
+    return counter
+
+
+def _pacing(cls, start):
+    fb = FrameBuffer(4, 1)
+    runner = cls(emulator.PicoUnicorn(), emulator.PicoGraphics(), fb,
+                 [("counter", _counter(fb), PACING_FPS)])
+    began = emulator._clock
+    start(runner)
+    failures = []
+    shown = [frame[0] for frame in runner.shown]
+    if shown != PACING_SHOWN:
+        failures.append("showed frames %s" % shown)
+    if runner.scheduler.missed != PACING_MISSED:
+        failures.append("missed %d steps" % runner.scheduler.missed)
+    elapsed = (emulator._clock - began) / 1000
+    # A few ms of rounding up per overrun
+    if not PACING_MS <= elapsed <= PACING_MS + 5:
+        failures.append("took %.1f virtual ms" % elapsed)
+    return failures
+
+
+@check
+def runner_pacing():
+    return _pacing(CaptureRunner, lambda runner: play(runner, PACING_FRAMES))
+
+
+@check
+def async_runner_pacing():
+    def start(runner):
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                runner.run()
+            except Finished:
+                pass
+    return _pacing(CaptureAsyncRunner, start)
+
+
+# Framebuffer push
+
+class PenOnly:
+    """Graphics without a framebuffer view, so push() falls back to pens"""
+
+    def __init__(self, w, h):
+        self.inner = emulator.PicoGraphics()
+        self.inner.width = w
+        self.inner.height = h
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def reference_push(buf, lut):
+    out = bytearray(len(buf))
+    for i in range(len(buf)):
+        out[i] = lut[buf[i]]
+    return bytes(out)
+
+
+@check
+def push():
+    module = importlib.import_module("dithering_claude")
+    w, h = module.fb.width, module.fb.height
+    failures = []
+    for brightness, gamma in ((1.0, 1.0), (1.0, GAMMA), (0.4, GAMMA)):
+        native = FrameBuffer(w, h)
+        pens = FrameBuffer(w, h)
+        native.set_brightness(brightness, gamma)
+        pens.set_brightness(brightness, gamma)
+        graphics = emulator.PicoGraphics()
+        fallback = PenOnly(w, h)
+        lut = framebuffer.gamma_table(brightness, gamma)
+        for name, func in effects_of(module):
+            for n, frame in enumerate(run(module, func, 20)):
+                native.buf[:] = frame
+                pens.buf[:] = frame
+                native.push(graphics)
+                pens.push(fallback)
+                want = reference_push(frame, lut)
+                if graphics.rgb() != want or fallback.inner.rgb() != want:
+                    failures.append("%s frame %d at brightness %s gamma %s" % (
+                        name, n, brightness, gamma))
+                    break
+    return failures
+
+
+# Table kernels
+
+@check
+def decay_tables():
+    rng = random.Random(SEED)
+    failures = []
+    buf = bytearray(rng.getrandbits(8) for _ in range(300))
+    for table, ref in ((decay.linear(15), lambda v: max(0, v - 15)),
+                       (decay.exponential(0.6), lambda v: int(v * 0.6))):
+        out = bytearray(buf)
+        decay.fade(out, table)
+        if list(out) != [ref(v) for v in buf]:
+            failures.append("fade")
+    table = decay.per_channel(decay.linear(5), decay.exponential(0.5), decay.linear(40))
+    out = bytearray(buf)
+    decay.fade_rgb(out, table)
+    if list(out) != [table[(i % 3) * 256 + v] for i, v in enumerate(buf)]:
+        failures.append("fade_rgb")
+    values = array('H', [rng.getrandbits(16) for _ in range(300)])
+    out = array('H', values)
+    decay.fade16(out, 3)
+    if list(out) != [v - (v >> 3) - 1 if v else 0 for v in values]:
+        failures.append("fade16")
+    return failures
+
+
+@check
+def hsv_ramps():
+    failures = []
+    worst = 0
+    for h in range(256):
+        for s in (0, 64, 128, 255):
+            for v in (0, 1, 100, 255):
+                got = hsv.rgb(hsv.hsv(h, s, v))
+                want = emulator.hsv_to_rgb(h / 256, s / 255, v / 255)
+                worst = max(worst, max(abs(a - b) for a, b in zip(got, want)))
+    if worst > TOLERANCE["hsv"]:
+        failures.append("hsv() off by %d" % worst)
+    hues = bytes(range(256))
+    values = bytes((i * 7) & 255 for i in range(256))
+    buf = bytearray(256 * 3)
+    hsv.fill_row(buf, 0, hues, values)
+    want = bytearray()
+    for h, v in zip(hues, values):
+        want += bytes(hsv.rgb(hsv.hsv(h, 255, v)))
+    if buf != want:
+        failures.append("fill_row")
+    return failures
+
+
+@check
+def oscillator_bank():
+    failures = []
+    worst = max(abs(oscillators.SINE[i] - int((math.sin(i * 2 * math.pi / 256) + 1) * 127))
+                for i in range(256))
+    if worst > TOLERANCE["sine"]:
+        failures.append("SINE off by %d" % worst)
+    rng = random.Random(SEED)
+    n = 50
+    osc = oscillators.OscillatorBank(n)
+    for i in range(n):
+        osc.set(i, rng.getrandbits(16), rng.getrandbits(16))
+    out = array('H', [0] * (n * 3))
+    for _ in range(20):
+        phases = list(osc.phase)
+        osc.render16(out)
+        for i, p in enumerate(phases):
+            for c, offset in enumerate(oscillators.OFFSETS):
+                want = oscillators.SINE[((p >> 8) + offset) & 255]
+                if abs((out[i * 3 + c] >> 8) - want) > TOLERANCE["render16"]:
+                    failures.append("render16 oscillator %d" % i)
+        steps = list(osc.step)
+        osc.advance()
+        if list(osc.phase) != [(p + s) & 0xFFFF for p, s in zip(phases, steps)]:
+            failures.append("advance")
+        if failures:
+            break
+    return failures[:1]
+
+
+@check
+def temporal_dither():
+    failures = []
+    rng = random.Random(SEED)
+    values = [rng.getrandbits(16) for _ in range(30)] + [0, 255, 65535, 65280]
+    for mode, subframes in ((dither.ERROR, 4), (dither.BCM, 4), (dither.BCM, 8)):
+        d = dither.Dither(len(values) // 3 + 1, mode, subframes)
+        for i, v in enumerate(values):
+            d.target[i] = v
+        cycle = 256 if mode == dither.ERROR else subframes
+        total = [0] * len(d.target)
+        buf = bytearray(len(d.target))
+        for _ in range(cycle):
+            d.render(buf)
+            total = [t + b for t, b in zip(total, buf)]
+        for i, v in enumerate(values):
+            mean = total[i] / cycle
+            want = min(255, v / 256)
+            # BCM resolves 1/subframes of a level per cycle
+            if abs(mean - want) > (1 / 256 if mode == dither.ERROR else 1 / subframes):
+                failures.append("mode %d/%d shows %.3f for %.3f" % (mode, subframes, mean, want))
+                break
+    # Through a gamma table the averaged output is what the curve asks for,
+    # down to the dim inputs the table alone shows as 0
+    values += [256, 8 * 256, 14 * 256 + 100]
+    for brightness in (1.0, 0.4):
+        fb = FrameBuffer(len(values) // 3 + 1, 1)
+        fb.set_brightness(brightness, GAMMA)
+        for mode, subframes in ((dither.ERROR, 4), (dither.BCM, 8)):
+            d = dither.Dither(fb.width, mode, subframes, fb)
+            for i, v in enumerate(values):
+                d.target[i] = v
+            cycle = 256 if mode == dither.ERROR else subframes
+            total = [0] * len(d.target)
+            buf = bytearray(len(d.target))
+            for _ in range(cycle):
+                d.render(buf)
+                total = [t + fb.lut[b] for t, b in zip(total, buf)]
+            for i, v in enumerate(values):
+                mean = total[i] / cycle
+                # The curve step v falls in, at its middle
+                x = min(1.0, ((v >> dither.CURVE_SHIFT << dither.CURVE_SHIFT) +
+                              (1 << dither.CURVE_SHIFT - 1)) / 65280)
+                want = x ** GAMMA * brightness * 255
+                # Output steps are up to 3 levels apart at the bright end
+                if abs(mean - want) > 3 * (1 / 256 if mode == dither.ERROR else 1 / subframes):
+                    failures.append("mode %d/%d at %g shows %.3f for %.3f" % (
+                        mode, subframes, brightness, mean, want))
+                    break
+    return failures
+
+
+@check
+def fire_render():
+    rng = random.Random(SEED)
+    f = fire.Fire(16, 7)
+    f.heat[:] = bytes(rng.randint(0, f.levels - 1) for _ in range(len(f.heat)))
+    buf = bytearray(16 * 7 * 3)
+    f.draw(buf)
+    want = bytearray()
+    for v in f.heat:
+        want += fire.DOOM[v * 3:v * 3 + 3]
+    failures = [] if buf == want else ["draw"]
+    # Each cell averages itself twice with its neighbours on the row below,
+    # already spread, less the cooling; the bottom row is left alone
+    for pos in (0, 77, 255):
+        want = list(f.heat)
+        for y in range(f.h - 2, -1, -1):
+            for x in range(f.w):
+                below = want[(y + 1) * f.w:(y + 2) * f.w]
+                v = (2 * below[x] + below[max(0, x - 1)] + below[min(f.w - 1, x + 1)]) // 4
+                want[y * f.w + x] = max(0, v - f.cool[(pos + y * f.w + x) & 255])
+        fire._spread(f, pos)
+        if list(f.heat) != want:
+            failures.append("spread")
+            break
+    return failures
+
+
+@check
+def sprite_blits():
+    failures = []
+    bitmaps = [[[0, 1, 1, 0, 1], [1, 1, 0, 1, 1], [1, 0, 1, 0, 0]],
+               [[1, 0, 0, 0, 1], [0, 1, 1, 1, 0], [1, 1, 0, 1, 1]]]
+    sprite = sprites.Sprite(bitmaps, (10, 20, 30))
+    fb = FrameBuffer(16, 7)
+    ref = FrameBuffer(16, 7)
+    for frame in range(2):
+        for y in range(-4, 9):
+            for x in range(-6, 18):
+                fb.clear()
+                ref.clear()
+                sprite.blit(fb, x, y, frame)
+                for dy, row in enumerate(bitmaps[frame]):
+                    for dx, pixel in enumerate(row):
+                        if pixel:
+                            ref.set_pixel(x + dx, y + dy, 10, 20, 30)
+                if fb.buf != ref.buf:
+                    failures.append("frame %d at (%d, %d)" % (frame, x, y))
+                    return failures
+    return failures
+
+
+@check
+def particle_splat():
+    # The box splat against the per-pixel scan persistence_trails used to do
+    rng = random.Random(SEED)
+    w, h = 16, 7
+    ps = particles.ParticleSystem(6, w, h)
+    ps.emit(particles.Emitter(0), 6)
+    colors = bytearray(rng.getrandbits(8) for _ in range(18))
+    for _ in range(50):
+        for i in range(ps.count):
+            ps.x[i] = rng.uniform(-1.5, w + 0.5)
+            ps.y[i] = rng.uniform(-1.5, h + 0.5)
+        buf = bytearray(w * h * 3)
+        ps.splat(buf, colors)
+        want = bytearray(w * h * 3)
+        for y in range(h):
+            for x in range(w):
+                for p in range(ps.count):
+                    if abs(ps.x[p] - x) < 1 and abs(ps.y[p] - y) < 1:
+                        want[(y * w + x) * 3:(y * w + x) * 3 + 3] = colors[p * 3:p * 3 + 3]
+                        break
+        if buf != want:
+            return ["splat"]
+    return []
+
+
+# Viper kernels on the host
+
+def _pointer(fmt, bits):
+    mask = (1 << bits) - 1
+
+    class Pointer:
+        """Indexes a buffer in fixed-size units, truncating stores as
+        viper's pointers do; out of range is an error rather than a
+        stray write"""
+
+        def __init__(self, obj):
+            view = memoryview(obj).cast("B")
+            self.view = view if fmt == "B" else view.cast(fmt)
+
+        def __getitem__(self, i):
+            if i < 0:
+                raise IndexError(i)
+            return self.view[i]
+
+        def __setitem__(self, i, v):
+            if i < 0:
+                raise IndexError(i)
+            self.view[i] = v & mask
+
+    Pointer.__name__ = "ptr%d" % bits
+    return Pointer
+
+
+POINTERS = {"ptr8": _pointer("B", 8), "ptr16": _pointer("H", 16), "ptr32": _pointer("I", 32)}
+
+
+def _viper(fn):
+    """micropython.viper stand-in: casts the arguments annotated as pointers"""
+    code = fn.__code__
+    casts = [(i, fn.__annotations__[name])
+             for i, name in enumerate(code.co_varnames[:code.co_argcount])
+             if fn.__annotations__.get(name) in POINTERS.values()]
+
+    def kernel(*args):
+        args = list(args)
+        for i, pointer in casts:
+            args[i] = pointer(args[i])
+        return fn(*args)
+    return kernel
+
+
+def viper_module(name):
+    """A fresh copy of a kernel module with its `if micropython:` branch taken"""
+    fake = types.ModuleType("micropython")
+    fake.viper = _viper
+    fake.native = lambda fn: fn
+    fake.const = lambda v: v
+    spec = importlib.util.find_spec(name)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(POINTERS)
+    saved = sys.modules.get("micropython")
+    sys.modules["micropython"] = fake
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del sys.modules["micropython"]
+        else:
+            sys.modules["micropython"] = saved
+    return module
+
+
+def _decay_case(m, rng):
+    out = bytearray()
+    buf = bytearray(rng.getrandbits(8) for _ in range(300))
+    m.fade(buf, m.linear(15))
+    m.fade(buf, m.exponential(0.6))
+    out += buf
+    m.fade_rgb(buf, m.per_channel(m.linear(5), m.exponential(0.5), m.linear(40)))
+    out += buf
+    values = array('H', [rng.getrandbits(16) for _ in range(300)])
+    m.fade16(values, 3)
+    return bytes(out) + values.tobytes()
+
+
+def _hsv_case(m, rng):
+    buf = bytearray(16 * 7 * 3)
+    for y in range(7):
+        hues = bytearray(rng.getrandbits(8) for _ in range(16))
+        values = bytearray(rng.getrandbits(8) for _ in range(16))
+        m.fill_row(buf, y * 16 * 3, hues, values)
+    return bytes(buf)
+
+
+def _oscillator_case(m, rng):
+    bank = m.OscillatorBank(50)
+    for i in range(50):
+        bank.set(i, rng.getrandbits(16), rng.getrandbits(16))
+    out = array('H', [0] * 150)
+    frames = b""
+    for _ in range(5):
+        bank.render16(out)
+        bank.advance()
+        frames += out.tobytes() + bank.phase.tobytes()
+    return frames
+
+
+def _dither_case(m, rng):
+    frames = b""
+    fb = FrameBuffer(4, 3)
+    fb.set_brightness(0.6, GAMMA)
+    for mode, subframes in ((m.ERROR, 4), (m.BCM, 8)):
+        for target in (None, fb):
+            random.seed(SEED)
+            d = m.Dither(12, mode, subframes, target)
+            for i in range(36):
+                d.target[i] = rng.getrandbits(16)
+            buf = bytearray(36)
+            for _ in range(10):
+                d.render(buf)
+                frames += bytes(buf)
+    return frames
+
+
+def _fire_case(m, rng):
+    random.seed(SEED)
+    f = m.Fire(16, 7)
+    buf = bytearray(16 * 7 * 3)
+    frames = b""
+    for _ in range(20):
+        f.step()
+        f.draw(buf)
+        frames += bytes(buf)
+    return frames
+
+
+def _framebuffer_case(m, rng):
+    fb = m.FrameBuffer(16, 7)
+    graphics = emulator.PicoGraphics()
+    out = []
+
+    def push():
+        out.append(fb.push(graphics))
+        out.append(graphics.rgb())
+
+    fb.fill(10, 200, 30)
+    push()
+    for _ in range(3):
+        for _ in range(20):
+            fb.set_pixel(rng.randrange(16), rng.randrange(7),
+                         rng.getrandbits(8), rng.getrandbits(8), rng.getrandbits(8))
+        push()
+    fb.set_brightness(0.4, GAMMA)
+    push()
+    fb.clear()
+    push()
+    return repr(out).encode()
+
+
+def _clip_case(m, rng):
+    colours = [(rng.getrandbits(8), rng.getrandbits(8), rng.getrandbits(8)) for _ in range(5)]
+    frames = []
+    frame = bytearray(16 * 7 * 3)
+    for _ in range(6):
+        for _ in range(15):
+            p = rng.randrange(16 * 7) * 3
+            frame[p:p + 3] = bytes(rng.choice(colours))
+        frames.append(bytes(frame))
+    palette, lookup, mask = clip._palette(frames)
+    palette = b"".join(bytes(c) for c in palette)
+    buf = bytearray(len(frame))
+    out = b""
+    prev = None
+    for frame in frames:
+        cur = bytearray(lookup[tuple(frame[i:i + 3])] for i in range(0, len(frame), 3))
+        if prev is not None:
+            # buf still shows prev
+            delta = clip._encode_delta(prev, cur)
+            m._decode_delta(delta, len(delta), palette, buf)
+            out += bytes(buf)
+        key = clip._encode_key(cur)
+        m._decode_key(key, len(key), palette, buf)
+        out += bytes(buf)
+        prev = cur
+    return out
+
+
+VIPER_CASES = (
+    ("decay", _decay_case),
+    ("hsv", _hsv_case),
+    ("oscillators", _oscillator_case),
+    ("dither", _dither_case),
+    ("fire", _fire_case),
+    ("framebuffer", _framebuffer_case),
+    ("clip", _clip_case),
+)
+
+
+@check
+def viper_kernels():
+    # Every viper body against its CPython fallback on the same input
+    failures = []
+    for name, case in VIPER_CASES:
+        module = importlib.import_module(name)
+        try:
+            got = case(viper_module(name), random.Random(SEED))
+        except Exception as e:
+            failures.append("%s: %s: %s" % (name, type(e).__name__, e))
+            continue
+        if got != case(module, random.Random(SEED)):
+            failures.append(name)
+    return failures
+
+
+@check
+def clip_playback():
+    module = importlib.import_module("grok_demo")
+    failures = []
+    fd, path = tempfile.mkstemp(suffix=".clip")
+    os.close(fd)
+    try:
+        for name, func in effects_of(module):
+            frames = run(module, func, 80)
+            clip.write(path, frames, module.fb.width, module.fb.height)
+            module.fb.clear()
+            played = [bytes(module.fb.buf) for _ in clip.play(path, module.fb)]
+            _, _, mask = clip._palette(frames)
+            expected = [bytes(v & mask for v in f) for f in frames]
+            if played != expected:
+                failures.append(name)
+                continue
+            # Cut the last frame short: playback stops before it
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) - 1)
+            module.fb.clear()
+            played = [bytes(module.fb.buf) for _ in clip.play(path, module.fb)]
+            if played != expected[:-1]:
+                failures.append(name + " (truncated)")
+        clip.write(path, frames, module.fb.width, module.fb.height, 30)
+        # A clip in a playlist works with the tools that look effects up
+        playlist = type("Script", (), {"effects": [clip.clip_entry("Clip", path, module.fb)]})
+        ((name, _),) = effects_of(playlist)
+        if fps_of(playlist, name) != 30:
+            failures.append("recorded fps")
+    finally:
+        os.remove(path)
+    return failures
+
+
+@check
+def numpy_renderer():
+    try:
+        import nprender
+    except ImportError:
+        print("  (numpy not installed, skipped)")
+        return []
+    module = importlib.import_module("dithering_claude")
+    funcs = dict(effects_of(module))
+    failures = []
+    for name, cls in nprender.EFFECTS.items():
+        frames = run(module, funcs[name], 10 ** 6)
+        random.seed(SEED)
+        batch = cls(module.fb.width, module.fb.height).frames(0, len(frames))
+        for n, frame in enumerate(frames):
+            if batch[n].tobytes() != frame:
+                failures.append("%s frame %d" % (name, n))
+                break
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="re-record the golden hashes")
+    parser.add_argument("-k", dest="match", help="only run checks whose name contains this")
+    args = parser.parse_args()
+
+    if args.update:
+        for script in SCRIPTS:
+            record(script)
+            print("recorded", golden_file(script))
+        return
+    failed = 0
+    for fn in CHECKS:
+        if args.match and args.match not in fn.__name__:
+            continue
+        failures = fn()
+        print("%-24s %s" % (fn.__name__, "FAIL" if failures else "ok"))
+        for failure in failures:
+            print("  " + failure)
+        failed += bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
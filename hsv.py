@@ -0,0 +1,93 @@
+"""Integer HSV to RGB from precomputed hue ramps.
+
+Hue, saturation and value are all bytes (0..255, hue 256 = a full turn):
+
+    pen = hsv(h, s, v)          # packed 0xRRGGBB
+    fill_row(fb.buf, y * w * 3, hues, values)
+
+The fully saturated, full brightness colour of every hue is kept in three
+256-entry ramps, so a conversion is three table lookups followed by scaling
+for saturation and value with a multiply and a shift. fill_row() converts a
+whole row of hue/value bytes into a framebuffer, as a viper loop on the Pico.
+"""
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+
+def _ramps():
+    red = bytearray(256)
+    green = bytearray(256)
+    blue = bytearray(256)
+    for h in range(256):
+        sector = h * 6 >> 8
+        f = h * 6 & 255
+        rgb = (
+            (255, f, 0),
+            (255 - f, 255, 0),
+            (0, 255, f),
+            (0, 255 - f, 255),
+            (f, 0, 255),
+            (255, 0, 255 - f),
+        )[sector]
+        red[h], green[h], blue[h] = rgb
+    return bytes(red), bytes(green), bytes(blue)
+
+
+RED, GREEN, BLUE = _ramps()
+
+
+def _channel(c, s, v):
+    # Blend towards white by (255 - s), then scale by v; 255 keeps x as is
+    c = 255 - ((255 - c) * (s + 1) >> 8)
+    return c * (v + 1) >> 8
+
+
+def hsv(h, s, v):
+    """8-bit hue, saturation and value to a packed 0xRRGGBB colour"""
+    h &= 255
+    return (_channel(RED[h], s, v) << 16 | _channel(GREEN[h], s, v) << 8 |
+            _channel(BLUE[h], s, v))
+
+
+def rgb(pen):
+    """Unpack a 0xRRGGBB colour into (r, g, b)"""
+    return pen >> 16 & 255, pen >> 8 & 255, pen & 255
+
+
+if micropython:
+    # Viper functions take at most four arguments on older firmware, so the
+    # ramps are read from the module and the count from hues
+    @micropython.viper
+    def _fill(buf: ptr8, start: int, hues, values: ptr8):
+        red = ptr8(RED)
+        green = ptr8(GREEN)
+        blue = ptr8(BLUE)
+        hue = ptr8(hues)
+        n = int(len(hues))
+        i = 0
+        j = start
+        while i < n:
+            h = hue[i]
+            v = values[i] + 1
+            buf[j] = (red[h] * v) >> 8
+            buf[j + 1] = (green[h] * v) >> 8
+            buf[j + 2] = (blue[h] * v) >> 8
+            i += 1
+            j += 3
+
+    def fill_row(buf, start, hues, values):
+        """Write fully saturated hues[i] at values[i] from byte offset start"""
+        _fill(buf, start, hues, values)
+else:
+    def fill_row(buf, start, hues, values):
+        """Write fully saturated hues[i] at values[i] from byte offset start"""
+        j = start
+        for i in range(len(hues)):
+            h = hues[i]
+            v = values[i] + 1
+            buf[j] = RED[h] * v >> 8
+            buf[j + 1] = GREEN[h] * v >> 8
+            buf[j + 2] = BLUE[h] * v >> 8
+            j += 3
@@ -0,0 +1,282 @@
+"""NumPy renderer for the math-heavy dithering_claude effects, host only.
+
+    python nprender.py subpixel_shimmer -W 64 -H 32 -n 1000 -o shimmer.npy
+
+Each effect is rebuilt as array expressions over whole frames, and over a
+batch of frames at once along a leading time axis:
+
+    random.seed(0)
+    effect = EFFECTS["quantum_superposition"](w, h)
+    frames = effect.frames(0, 300)      # uint8, shape (300, h, w, 3)
+
+frames[i].tobytes() is the fb.buf the effect draws on the host emulator on
+the same frame, given the same random seed, and it works on canvases of any
+size. The renderers draw their random numbers in the same order as the
+effects and reuse their tables (hue ramps, sine table, dither thresholds).
+Per-row and per-column wave terms are still computed with math.sin/cos, as
+the effects do, so no rounding differs from CPython's doubles. The one
+per-pixel numpy sin (chromatic_aberration) is redone with math.sin for the
+few pixels that land next to the on/off threshold. The Pico's floats are
+single precision, so the float-threshold effects (chromatic_aberration,
+quantum_superposition, interlaced_waves) can differ from it by a pixel.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+import emulator
+import hsv
+import oscillators
+from dither import CURVE_SHIFT, _curve, _thresholds
+from framebuffer import IDENTITY
+from geometry import Geometry
+
+
+def _demo():
+    """dithering_claude, for the colours and patterns it defines"""
+    if "picounicorn" not in sys.modules:
+        emulator.install()
+    import dithering_claude
+    return dithering_claude
+
+
+def _times(start, count, dt):
+    return [f * dt for f in range(start, start + count)]
+
+
+def _wave(n, k, phases, fn=math.sin):
+    """(len(phases), n) array of fn(i * k + phase), as waves.wave() fills it"""
+    return np.array([[fn(i * k + phase) for i in range(n)] for phase in phases])
+
+
+class SubpixelShimmer:
+    length = 300
+
+    def __init__(self, w, h):
+        demo = _demo()
+        self.w = w
+        self.h = h
+        self.phase = np.array([[random.randint(0, 3) for _ in range(w)] for _ in range(h)])
+        self.patterns = np.array(demo.TemporalDither().dither_patterns)
+        red, green, blue, yellow = demo.RED, demo.GREEN, demo.BLUE, demo.YELLOW
+        # Colour pairs mixed on frame % 4
+        self.pairs = np.array([
+            (red, green), (blue, yellow), (red, blue), (green, yellow),
+        ], dtype=np.uint8)
+
+    def frames(self, start, count):
+        ts = _times(start, count, 0.02)
+        wave1 = _wave(self.w, 0.5, ts) * 0.5 + 0.5
+        wave2 = _wave(self.h, 0.5, [t * 1.3 for t in ts]) * 0.5 + 0.5
+        combined = wave1[:, None, :] * wave2[:, :, None]
+        n = len(self.patterns)
+        index = np.minimum((combined * n).astype(int), n - 1)
+        fs = np.arange(start, start + count)
+        # TemporalDither.update() runs before the first frame is drawn
+        step = ((fs + 1)[:, None, None] + self.phase) % n
+        use_first = self.patterns[index, step].astype(bool)
+        pairs = self.pairs[fs % 4]
+        return np.where(use_first[..., None], pairs[:, None, None, 0], pairs[:, None, None, 1])
+
+
+class ChromaticAberration:
+    length = 200
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.dist = np.array(Geometry(w, h).dist).reshape(h, w)
+
+    def shift(self, dx, dy):
+        """Geometry.shift() of the distance map"""
+        w = self.w
+        h = self.h
+        fx = math.floor(dx)
+        fy = math.floor(dy)
+        ax = dx - fx
+        ay = dy - fy
+        w00 = (1 - ax) * (1 - ay)
+        w10 = ax * (1 - ay)
+        w01 = (1 - ax) * ay
+        w11 = ax * ay
+        cols0 = np.clip(np.arange(w) + fx, 0, w - 1)
+        cols1 = np.clip(np.arange(w) + fx + 1, 0, w - 1)
+        rows0 = self.dist[np.clip(np.arange(h) + fy, 0, h - 1)]
+        rows1 = self.dist[np.clip(np.arange(h) + fy + 1, 0, h - 1)]
+        return (rows0[:, cols0] * w00 + rows0[:, cols1] * w10 +
+                rows1[:, cols0] * w01 + rows1[:, cols1] * w11)
+
+    def frames(self, start, count):
+        out = np.zeros((count, self.h, self.w, 3), dtype=np.uint8)
+        for k, frame in enumerate(range(start, start + count)):
+            t = frame * 0.02
+            channel = frame % 3
+            if channel == 0:
+                dx, dy = math.sin(t) * 0.5, 0
+            elif channel == 1:
+                dx, dy = 0, math.cos(t) * 0.5
+            else:
+                dx, dy = -math.sin(t) * 0.5, -math.cos(t) * 0.5
+            d = self.shift(dx, dy) - t * 5
+            pattern = np.sin(d) * 0.5 + 0.5
+            for y, x in zip(*np.nonzero(np.abs(pattern - 0.3) < 1e-9)):
+                pattern[y, x] = math.sin(d[y, x]) * 0.5 + 0.5
+            out[k, :, :, channel] = np.where(pattern > 0.3, 255, 0)
+        return out
+
+
+class InterlacedWaves:
+    length = 400
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.cos_y = _wave(h, 0.5, [0], math.cos)[0]
+        self.sin_y = _wave(h, 0.5, [0])[0]
+
+    def _draw(self, start, count):
+        # Every row as it would be drawn on each frame, ignoring interlacing
+        ts = _times(start, count, 0.01)
+        wave1 = _wave(self.w, 0.8, [t * 2 for t in ts])
+        wave2 = _wave(self.h, 1.2, [t * 3 for t in ts], math.cos)
+        sin3 = _wave(self.w, 0.5, ts)
+        cos3 = _wave(self.w, 0.5, ts, math.cos)
+        combined = (wave1[:, None, :] + wave2[:, :, None] +
+                    sin3[:, None, :] * self.cos_y[None, :, None] +
+                    cos3[:, None, :] * self.sin_y[None, :, None]) / 3
+        even = (np.arange(start, start + count) % 2 == 0)[:, None, None]
+        hues = np.where(combined > 0, np.where(even, 0, 154), np.where(even, 77, 205))
+        values = (np.abs(combined) * 255).astype(np.int64) + 1
+        out = np.empty(combined.shape + (3,), dtype=np.uint8)
+        for c, ramp in enumerate((hsv.RED, hsv.GREEN, hsv.BLUE)):
+            out[..., c] = np.frombuffer(ramp, dtype=np.uint8)[hues].astype(np.int64) * values >> 8
+        return out
+
+    def frames(self, start, count):
+        first = max(0, start - 1)
+        drawn = self._draw(first, start + count - first)
+        if start == 0:
+            # Rows not drawn yet are still black
+            drawn = np.concatenate([np.zeros_like(drawn[:1]), drawn])
+        rows = np.arange(self.h) % 2
+        out = np.empty((count,) + drawn.shape[1:], dtype=np.uint8)
+        for k, frame in enumerate(range(start, start + count)):
+            # This frame's rows, and the other half from the frame before
+            current = rows == frame % 2
+            out[k] = np.where(current[:, None, None], drawn[k + 1], drawn[k])
+        return out
+
+
+class QuantumSuperposition:
+    length = 300
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+
+    def frames(self, start, count):
+        ts = _times(start, count, 0.02)
+        sx = _wave(self.w, 0.5, ts)
+        cy = _wave(self.h, 0.5, ts, math.cos)
+        cx = _wave(self.w, 0.7, [-t for t in ts], math.cos)
+        sy = _wave(self.h, 0.7, [-t for t in ts])
+        psi1 = sx[:, None, :] * cy[:, :, None]
+        psi2 = cx[:, None, :] * sy[:, :, None]
+        prob1 = psi1 * psi1
+        prob2 = psi2 * psi2
+        fs = np.arange(start, start + count)[:, None, None]
+        measurement = (fs + np.arange(self.w)[None, None, :] + np.arange(self.h)[None, :, None]) % 4
+        red = (prob1 * 255).astype(np.uint8)
+        green = (prob2 * 255).astype(np.uint8)
+        blue = ((prob1 + prob2) * 127).astype(np.uint8)
+        intensity = (np.sqrt(prob1 * prob2) * 255).astype(np.uint8)
+        out = np.zeros((count, self.h, self.w, 3), dtype=np.uint8)
+        out[..., 0] = np.where(measurement == 0, red, np.where(measurement == 3, intensity, 0))
+        out[..., 1] = np.where(measurement == 1, green, np.where(measurement == 3, intensity, 0))
+        out[..., 2] = np.where(measurement == 2, blue, 0)
+        return out
+
+
+class PhaseCycling:
+    length = 500
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        n = w * h
+        phase = []
+        step = []
+        for _ in range(n):
+            phase.append(random.getrandbits(16))
+            step.append(oscillators.increment(random.uniform(0.5, 2.0), 0.02))
+        self.phase = np.array(phase, dtype=np.int64)
+        self.step = np.array(step, dtype=np.int64)
+        # Dither(w * h, BCM, 8) draws its pixel phases next
+        self.dither_phase = np.array([random.getrandbits(8) for _ in range(n)], dtype=np.int64)
+        self.thresholds = np.frombuffer(_thresholds(8), dtype=np.uint8).astype(np.int64)
+        self.sine = np.frombuffer(oscillators.SINE, dtype=np.uint8).astype(np.int64)
+        # The dither works through the demo's gamma table, as Dither(fb=fb) does
+        fb = _demo().fb
+        self.curve = None
+        if fb.lut is not IDENTITY:
+            self.curve = [np.frombuffer(t, dtype=np.uint8).astype(np.int64)
+                          for t in _curve(fb.lut, fb.brightness, fb.gamma)]
+
+    def frames(self, start, count):
+        fs = np.arange(start, start + count, dtype=np.int64)[:, None]
+        phase = (self.phase + fs * self.step) & 0xFFFF
+        k = phase >> 8
+        f = phase & 255
+        t = self.thresholds[(fs % 8 + self.dither_phase) & 7]
+        out = np.empty((count, self.w * self.h, 3), dtype=np.uint8)
+        for c, offset in enumerate(oscillators.OFFSETS):
+            a = self.sine[(k + offset) & 255]
+            b = self.sine[(k + offset + 1) & 255]
+            v = (a << 8) + (b - a) * f
+            if self.curve is not None:
+                low, high, frac = self.curve
+                j = v >> CURVE_SHIFT
+                out[..., c] = np.where(frac[j] > t, high[j], low[j])
+            else:
+                level = v >> 8
+                out[..., c] = level + (((v & 255) > t) & (level < 255))
+        return out.reshape(count, self.h, self.w, 3)
+
+
+EFFECTS = {
+    "subpixel_shimmer": SubpixelShimmer,
+    "chromatic_aberration": ChromaticAberration,
+    "interlaced_waves": InterlacedWaves,
+    "quantum_superposition": QuantumSuperposition,
+    "phase_cycling": PhaseCycling,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("effect", choices=sorted(EFFECTS))
+    parser.add_argument("-W", "--width", type=int, default=16)
+    parser.add_argument("-H", "--height", type=int, default=7)
+    parser.add_argument("-n", "--frames", type=int, help="default: the effect's length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save the frames as .npy")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    effect = EFFECTS[args.effect](args.width, args.height)
+    count = args.frames or effect.length
+    started = time.perf_counter()
+    frames = effect.frames(0, count)
+    elapsed = time.perf_counter() - started
+    print("%s: %d frames of %dx%d in %.3f s (%.0f fps)" % (
+        args.effect, count, args.width, args.height, elapsed, count / elapsed))
+    if args.output:
+        np.save(args.output, frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Integer oscillator bank driven by a sine wavetable.
+
+    osc = OscillatorBank(w * h)
+    osc.set(i, phase, freq)
+    while True:
+        osc.render16(dither.target)
+        dither.render(fb.buf)
+        osc.advance()
+        yield
+
+Every oscillator is a 16-bit phase accumulator: 65536 is one full turn. Each
+advance() adds the oscillator's increment, wrapping for free, and render16()
+looks the top 8 bits up in a 256-entry sine table, so a frame is integer adds
+and byte lookups with no trig at all.
+
+Colour channels read the same oscillator a third of a turn apart (OFFSETS),
+the table equivalent of adding 2.094 and 4.189 radians. render16()
+interpolates between table entries with the low 8 bits of the phase and
+writes 8.8 fixed-point colour for a Dither (see dither.py).
+"""
+from array import array
+import math
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+TURN = 65536
+
+# (sin + 1) * 127 over one turn, the scaling phase_cycling always used
+SINE = bytes(int((math.sin(i * 2 * math.pi / 256) + 1) * 127) for i in range(256))
+
+# Table steps between the red, green and blue readings
+OFFSETS = (0, 85, 171)
+
+
+def increment(freq, dt):
+    """Accumulator step for freq radians per second at dt seconds per frame"""
+    return int(freq * dt * TURN / (2 * math.pi)) & 0xFFFF
+
+
+if micropython:
+    @micropython.viper
+    def _advance(phase: ptr16, step: ptr16, n: int):
+        i = 0
+        while i < n:
+            phase[i] = phase[i] + step[i]
+            i += 1
+
+    @micropython.viper
+    def _render16(phase: ptr16, table: ptr8, out: ptr16, n: int):
+        i = 0
+        j = 0
+        while i < n:
+            p = phase[i]
+            k = p >> 8
+            f = p & 255
+            c = 0
+            while c < 3:
+                # 0, 85 or 171 steps on, as in OFFSETS
+                a = table[(k + 85 * c + (c >> 1)) & 255]
+                b = table[(k + 85 * c + (c >> 1) + 1) & 255]
+                out[j + c] = (a << 8) + (b - a) * f
+                c += 1
+            i += 1
+            j += 3
+else:
+    def _advance(phase, step, n):
+        for i in range(n):
+            phase[i] = (phase[i] + step[i]) & 0xFFFF
+
+    def _render16(phase, table, out, n):
+        j = 0
+        for i in range(n):
+            p = phase[i]
+            k = p >> 8
+            f = p & 255
+            for c in range(3):
+                a = table[(k + OFFSETS[c]) & 255]
+                b = table[(k + OFFSETS[c] + 1) & 255]
+                out[j + c] = (a << 8) + (b - a) * f
+            j += 3
+
+
+class OscillatorBank:
+    def __init__(self, n):
+        self.n = n
+        self.phase = array('H', [0] * n)
+        self.step = array('H', [0] * n)
+
+    def set(self, i, phase, step):
+        """Start oscillator i at phase (0..65535) with the given increment"""
+        self.phase[i] = phase & 0xFFFF
+        self.step[i] = step & 0xFFFF
+
+    def advance(self):
+        """Move every oscillator on one frame"""
+        _advance(self.phase, self.step, self.n)
+
+    def render16(self, out):
+        """Write each oscillator's colour to an array('H') in 8.8 fixed point"""
+        _render16(self.phase, SINE, out, self.n)
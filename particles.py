@@ -0,0 +1,251 @@
+"""Struct-of-arrays particle engine.
+
+Each particle property is one array('f') column indexed by particle number,
+so updating hundreds of particles walks flat arrays instead of looking up
+attributes on hundreds of objects, and the storage is allocated once:
+
+    ps = ParticleSystem(64, w, h)
+    ps.emit(fire(h), 8)
+    ps.emit(electric(), 6)
+    while True:
+        ps.update()
+        ps.draw(fb)
+        yield
+
+Emitters describe where new particles appear and how they move. A particle
+whose life runs out is respawned by the emitter that made it, so a fire
+particle stays a fire particle.
+
+splat() and splat_bilinear() write a particle straight into a flat RGB buffer
+at its own coordinates, so drawing costs O(particles) however big the canvas.
+"""
+from array import array
+import math
+import random
+
+# Colour schemes, as (red, green, blue) right shifts applied to the brightness
+FIRE = 0      # Orange/yellow
+ELECTRIC = 1  # Cyan/blue
+SPIRAL = 2    # Purple/magenta
+MATRIX = 3    # Green
+SHIFTS = (
+    (0, 1, 2),
+    (2, 1, 0),
+    (0, 2, 1),
+    (8, 0, 2),
+)
+
+
+class Emitter:
+    """Spawn rules: each of x/y/vx/vy/decay is a (low, high) range.
+
+    x and y default to the whole canvas.
+    """
+
+    def __init__(self, kind, x=None, y=None, vx=(-0.5, 0.5), vy=(-0.5, 0.5),
+                 decay=(0.01, 0.03)):
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+        self.decay = decay
+
+    def spawn(self, ps, i):
+        x = self.x or (0, ps.w)
+        y = self.y or (0, ps.h)
+        ps.x[i] = random.uniform(x[0], x[1])
+        ps.y[i] = random.uniform(y[0], y[1])
+        ps.vx[i] = random.uniform(self.vx[0], self.vx[1])
+        ps.vy[i] = random.uniform(self.vy[0], self.vy[1])
+        ps.life[i] = 1.0
+        ps.decay[i] = random.uniform(self.decay[0], self.decay[1])
+        ps.kind[i] = self.kind
+
+
+def splat(buf, w, h, x, y, r, g, b):
+    """Set every pixel less than one pixel away from (x, y) on both axes"""
+    x0 = int(x)
+    y0 = int(y)
+    # A fractional coordinate also touches the next pixel along
+    x1 = x0 + 2 if x > x0 else x0 + 1
+    y1 = y0 + 2 if y > y0 else y0 + 1
+    for py in range(max(y0, 0), min(y1, h)):
+        for px in range(max(x0, 0), min(x1, w)):
+            i = (py * w + px) * 3
+            buf[i] = r
+            buf[i + 1] = g
+            buf[i + 2] = b
+
+
+def splat_bilinear(buf, w, h, x, y, r, g, b):
+    """Spread the colour over the four pixels around (x, y) by coverage.
+
+    Each pixel keeps the brighter of its old value and its share, so a
+    particle brightens its trail without wiping it.
+    """
+    x0 = math.floor(x)
+    y0 = math.floor(y)
+    fx = x - x0
+    fy = y - y0
+    for py, wy in ((y0, 1 - fy), (y0 + 1, fy)):
+        if not 0 <= py < h or wy <= 0:
+            continue
+        for px, wx in ((x0, 1 - fx), (x0 + 1, fx)):
+            if not 0 <= px < w or wx <= 0:
+                continue
+            k = wx * wy
+            i = (py * w + px) * 3
+            buf[i] = max(buf[i], int(r * k))
+            buf[i + 1] = max(buf[i + 1], int(g * k))
+            buf[i + 2] = max(buf[i + 2], int(b * k))
+
+
+# Presets used by enhanced_particle_trails
+def fire(h):
+    """Rises from the bottom row"""
+    return Emitter(FIRE, y=(h - 1, h - 1), vx=(-0.2, 0.2), vy=(-0.8, -0.3))
+
+
+def electric():
+    """Darts sideways"""
+    return Emitter(ELECTRIC, vx=(-1, 1), vy=(0, 0))
+
+
+def spiral():
+    """Steered round in circles by ParticleSystem.spin()"""
+    return Emitter(SPIRAL)
+
+
+class ParticleSystem:
+    def __init__(self, capacity, w, h):
+        self.capacity = capacity
+        self.w = w
+        self.h = h
+        self.count = 0
+        self.x = array('f', [0] * capacity)
+        self.y = array('f', [0] * capacity)
+        self.vx = array('f', [0] * capacity)
+        self.vy = array('f', [0] * capacity)
+        self.life = array('f', [0] * capacity)
+        self.decay = array('f', [0] * capacity)
+        self.hue = array('f', [0] * capacity)
+        self.kind = bytearray(capacity)
+        self.source = bytearray(capacity)
+        self.emitters = []
+
+    def clear(self):
+        self.count = 0
+        self.emitters = []
+
+    def emit(self, emitter, n):
+        """Add n particles from an emitter (up to capacity)"""
+        if emitter not in self.emitters:
+            self.emitters.append(emitter)
+        source = self.emitters.index(emitter)
+        for _ in range(min(n, self.capacity - self.count)):
+            i = self.count
+            self.source[i] = source
+            emitter.spawn(self, i)
+            self.count += 1
+
+    def update(self):
+        """Move, wrap around the edges and respawn dead particles"""
+        x = self.x
+        y = self.y
+        vx = self.vx
+        vy = self.vy
+        life = self.life
+        decay = self.decay
+        w = self.w
+        h = self.h
+        for i in range(self.count):
+            px = x[i] + vx[i]
+            py = y[i] + vy[i]
+            if px < 0:
+                px = w
+            elif px > w:
+                px = 0
+            if py < 0:
+                py = h
+            elif py > h:
+                py = 0
+            x[i] = px
+            y[i] = py
+            life[i] -= decay[i]
+            if life[i] <= 0:
+                self.emitters[self.source[i]].spawn(self, i)
+
+    def bounce(self):
+        """Move, reflecting off the edges; life is left alone"""
+        x = self.x
+        y = self.y
+        vx = self.vx
+        vy = self.vy
+        right = self.w - 1
+        bottom = self.h - 1
+        for i in range(self.count):
+            x[i] += vx[i]
+            y[i] += vy[i]
+            if x[i] <= 0 or x[i] >= right:
+                vx[i] = -vx[i]
+            if y[i] <= 0 or y[i] >= bottom:
+                vy[i] = -vy[i]
+
+    def spin(self, kind, angle, speed=0.3):
+        """Point every particle of a kind along a circle, offset by its index"""
+        vx = self.vx
+        vy = self.vy
+        k = self.kind
+        for i in range(self.count):
+            if k[i] == kind:
+                a = angle + i
+                vx[i] = math.cos(a) * speed
+                vy[i] = math.sin(a) * speed
+
+    def deposit(self, trail):
+        """Add each particle's brightness to a w*h bytearray, saturating"""
+        x = self.x
+        y = self.y
+        life = self.life
+        w = self.w
+        h = self.h
+        for i in range(self.count):
+            px = int(x[i])
+            py = int(y[i])
+            if 0 <= px < w and 0 <= py < h:
+                j = py * w + px
+                trail[j] = min(255, trail[j] + int(255 * life[i]))
+
+    def splat(self, buf, colors, smooth=False):
+        """Write every particle into a w*h*3 buffer.
+
+        colors holds three bytes per particle. smooth uses the bilinear splat.
+        Where particles overlap the lowest-numbered one ends up on top.
+        """
+        write = splat_bilinear if smooth else splat
+        x = self.x
+        y = self.y
+        for i in range(self.count - 1, -1, -1):
+            j = i * 3
+            write(buf, self.w, self.h, x[i], y[i], colors[j], colors[j + 1], colors[j + 2])
+
+    def draw(self, fb):
+        """Plot each particle in its kind's colour scaled by its life"""
+        buf = fb.buf
+        x = self.x
+        y = self.y
+        life = self.life
+        kind = self.kind
+        w = self.w
+        h = self.h
+        for i in range(self.count):
+            px = int(x[i])
+            py = int(y[i])
+            if 0 <= px < w and 0 <= py < h:
+                brightness = int(255 * life[i])
+                rs, gs, bs = SHIFTS[kind[i]]
+                j = (py * w + px) * 3
+                buf[j] = brightness >> rs
+                buf[j + 1] = brightness >> gs
+                buf[j + 2] = brightness >> bs
@@ -0,0 +1,58 @@
+"""Interned pens so effects don't call create_pen for every pixel.
+
+    pens = PenCache(graphics)
+    graphics.set_pen(pens.rgb(255, 128, 0))
+
+Colours are keyed by a packed integer, so a lookup never builds a tuple. The
+map holds at most `size` pens; when it is full the least recently used
+quarter is dropped in one pass, so a run of misses doesn't rescan the map
+every time. rgb565() folds nearby colours onto one key (5-6-5 bits), which
+keeps the hit rate high for effects that sweep smooth gradients.
+"""
+
+
+class PenCache:
+    def __init__(self, graphics, size=128):
+        self.graphics = graphics
+        self.size = size
+        self.pens = {}
+        self.used = {}
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _pen(self, key, r, g, b):
+        pen = self.pens.get(key)
+        self.clock += 1
+        if pen is None:
+            self.misses += 1
+            if len(self.pens) >= self.size:
+                self._evict()
+            pen = self.graphics.create_pen(r, g, b)
+            self.pens[key] = pen
+        else:
+            self.hits += 1
+        self.used[key] = self.clock
+        return pen
+
+    def _evict(self):
+        used = self.used
+        oldest = sorted(used, key=used.get)[:max(1, self.size // 4)]
+        for key in oldest:
+            del used[key]
+            del self.pens[key]
+
+    def rgb(self, r, g, b):
+        """Pen for an exact 8-bit colour"""
+        return self._pen((r << 16) | (g << 8) | b, r, g, b)
+
+    def rgb565(self, r, g, b):
+        """Pen for the colour quantized to 5-6-5 bits"""
+        r &= 0xF8
+        g &= 0xFC
+        b &= 0xF8
+        return self._pen((r << 8) | (g << 3) | (b >> 3), r | (r >> 5), g | (g >> 6), b | (b >> 5))
+
+    def clear(self):
+        self.pens = {}
+        self.used = {}
@@ -0,0 +1,65 @@
+"""Record an effect into a clip file on the host emulator.
+
+    python record.py dithering_claude subpixel_shimmer -o shimmer.clip
+    python record.py grok_demo draw_doom -n 600 --seed 3 -o doom.clip
+
+The effect runs through its generator exactly as the runner would play it,
+and every frame of fb.buf is captured. The clip plays back on the Pico with
+clip.clip_entry(); see clip.py for the format.
+"""
+import argparse
+import importlib
+import os
+import random
+
+import emulator
+from bench import effects_of
+import clip
+
+
+def capture(module, func, frames, seed=0):
+    """fb.buf after each of the effect's first frames (fewer if it ends)"""
+    random.seed(seed)
+    out = []
+    for _ in func():
+        out.append(bytes(module.fb.buf))
+        if len(out) >= frames:
+            break
+    return out
+
+
+def fps_of(module, name):
+    for attr in ("animations", "effects", "modes"):
+        for _, func, fps in getattr(module, attr, ()):
+            if func.__name__ == name:
+                return fps
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("script")
+    parser.add_argument("effect")
+    parser.add_argument("-n", "--frames", type=int, default=300)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fps", type=int, help="playback rate (default: the playlist's)")
+    args = parser.parse_args()
+
+    emulator.install()
+    module = importlib.import_module(args.script)
+    funcs = dict(effects_of(module))
+    if args.effect not in funcs:
+        parser.error("%s has no effect %s" % (args.script, args.effect))
+    frames = capture(module, funcs[args.effect], args.frames, args.seed)
+    fps = args.fps or fps_of(module, args.effect)
+    path = args.output or args.effect + ".clip"
+    fb = module.fb
+    clip.write(path, frames, fb.width, fb.height, fps)
+    size = os.path.getsize(path)
+    raw = len(frames) * len(fb.buf)
+    print("%s: %d frames, %d bytes (%.1f%% of raw)" % (path, len(frames), size, 100 * size / raw))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Central frame loop shared by the demo scripts.
+
+Effects are generator functions that draw one frame into the framebuffer and
+then yield:
+
+    def fade_in():
+        for level in range(256):
+            fb.fill(level, level, level)
+            yield
+
+The runner owns the only loop. Every frame it polls the buttons, advances the
+current effect, then pushes the framebuffer to the display, so a button press
+is seen within one frame however long the effect runs. When an effect
+finishes the next one in the playlist starts on the same frame.
+
+Pacing comes from a Scheduler: effects step at their playlist fps scaled by
+scheduler.speed, and a frame that overruns its budget makes the next loop
+catch up on simulation without rendering the frames in between.
+
+Setting runner.telemetry to a telemetry.Telemetry times the compute and push
+halves of every frame and reports them over the serial console.
+
+Garbage is collected on the runner's schedule rather than the allocator's:
+every collect_every frames gc.collect() runs right after a frame has been
+shown, once a frame comes with COLLECT_PAUSE_MS to spare before the next
+one is due (or regardless, if none has for another collect_every frames).
+A collection walks the whole heap, so its pause depends on the heap size
+rather than the amount of garbage; 5 ms is the worst case budgeted for the
+Pico's ~190 KB heap, and telemetry reports the measured one.
+
+The runners' own per-frame work (polling, pacing, pushing, AsyncRunner's
+tick) and the integer effects allocate nothing. Effects that still compute
+in floats (particles, waves, geometry) box a float per operation on the
+Pico; that garbage is small and short-lived, and collecting it on schedule
+keeps the heap from filling, so the automatic collector shouldn't fire in
+the middle of a frame. Telemetry's per-frame allocation counts show which
+effects are which.
+"""
+import gc
+import time
+
+from scheduler import Scheduler
+
+# Frames between scheduled collections, and the pause they are budgeted for
+COLLECT_EVERY = 50
+COLLECT_PAUSE_MS = 5
+
+
+class Runner:
+    def __init__(self, picounicorn, graphics, fb, effects, buttons=None):
+        """effects is a list of (name, generator function, fps or None)"""
+        self.picounicorn = picounicorn
+        self.graphics = graphics
+        self.fb = fb
+        self.effects = effects
+        self.buttons = buttons or {}
+        # Polled every frame; a list, so no dict view is allocated each time
+        self._buttons = list(self.buttons.items())
+        self.held = {}
+        self.paused = False
+        self.scheduler = Scheduler()
+        self.index = 0
+        self.frames = None
+        self.frame = 0
+        self.brightness = fb.brightness
+        self.telemetry = None
+        self.collect_every = COLLECT_EVERY
+        self._until_collect = COLLECT_EVERY
+
+    def select(self, index):
+        """Start an effect from its first frame"""
+        sched = self.scheduler
+        if self.frames is not None and sched.missed:
+            print(f"  {sched.missed} missed deadlines in {sched.frames} frames")
+        self.index = index % len(self.effects)
+        name, effect, fps = self.effects[self.index]
+        print(f"Playing: {name}")
+        if self.telemetry:
+            self.telemetry.effect(name)
+        self.frame = 0
+        sched.reset(fps)
+        self.start(effect)
+
+    def start(self, effect):
+        self.frames = effect()
+
+    def next(self):
+        self.select(self.index + 1)
+
+    def poll(self):
+        """Run the action of every button that went down since the last poll"""
+        held = self.held
+        for button, action in self._buttons:
+            pressed = self.picounicorn.is_pressed(button)
+            if pressed and not held.get(button):
+                action(self)
+            held[button] = pressed
+
+    def advance(self):
+        """Step the current effect by one frame, moving on when it finishes"""
+        if self.frames is None:
+            self.select(self.index)
+        try:
+            next(self.frames)
+        except StopIteration:
+            self.next()
+            next(self.frames)
+        self.frame += 1
+
+    def set_brightness(self, level):
+        """Global brightness (0..1) of everything shown"""
+        self.fb.set_brightness(level)
+        self.brightness = self.fb.brightness
+
+    def show(self):
+        telemetry = self.telemetry
+        if telemetry:
+            started = time.ticks_us()
+        self.fb.push(self.graphics)
+        self.picounicorn.update(self.graphics)
+        if telemetry:
+            telemetry.push(time.ticks_diff(time.ticks_us(), started))
+        self.collect()
+
+    def collect(self):
+        """Scheduled gc.collect(), between frames"""
+        if not self.collect_every:
+            return
+        self._until_collect -= 1
+        if self._until_collect > 0:
+            return
+        if (self.scheduler.remaining_ms() < COLLECT_PAUSE_MS and
+                self._until_collect > -self.collect_every):
+            # Too close to the next frame; try again after the next one
+            return
+        self._until_collect = self.collect_every
+        telemetry = self.telemetry
+        if telemetry:
+            started = time.ticks_us()
+        gc.collect()
+        if telemetry:
+            telemetry.collected(time.ticks_diff(time.ticks_us(), started))
+
+    def step(self):
+        """Poll input, then simulate and render whatever is due"""
+        self.poll()
+        if self.frames is None:
+            self.select(self.index)
+        steps = self.scheduler.due()
+        if not steps:
+            return
+        if not self.paused:
+            telemetry = self.telemetry
+            if telemetry:
+                started = time.ticks_us()
+            for _ in range(steps):
+                self.advance()
+            if telemetry:
+                telemetry.compute(time.ticks_diff(time.ticks_us(), started))
+        self.show()
+
+    def run(self):
+        while True:
+            self.step()
+            self.scheduler.wait()
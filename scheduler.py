@@ -0,0 +1,103 @@
+"""Fixed-timestep frame pacing on time.ticks_ms.
+
+The scheduler turns wall-clock time into a number of simulation steps. Each
+step is one frame of an effect at its target fps, scaled by `speed`:
+
+    sched = Scheduler(30)
+    while True:
+        steps = sched.due()
+        for _ in range(steps):
+            next(frames)
+        if steps:
+            show()
+        sched.wait()
+
+When a frame runs over budget the next call to due() asks for more than one
+step. The animation keeps its pace and only the rendering of the skipped
+frames is lost; those are counted in `missed`. At most `max_steps` are
+caught up at once, anything beyond that is dropped from the timeline (and
+also counted) so a slow effect can't spiral.
+
+With fps=None every call to due() is one step and wait() returns at once,
+for effects that want to run as fast as the hardware allows.
+
+The pacing arithmetic is all small ints, so due() and remaining_ms() don't
+allocate: fps * speed is kept as thousandths of a step per second and only
+recomputed when either changes.
+"""
+import time
+
+
+class Scheduler:
+    def __init__(self, fps=None, max_steps=4):
+        self.fps = fps
+        self._speed = 1.0
+        self._update_rate()
+        self.max_steps = max_steps
+        self.missed = 0
+        self.frames = 0
+        self._last = None
+        # Thousandths of a step waiting to run
+        self._acc = 0
+
+    @property
+    def speed(self):
+        return self._speed
+
+    @speed.setter
+    def speed(self, value):
+        self._speed = value
+        self._update_rate()
+
+    def _update_rate(self):
+        # Thousandths of a step per second
+        self._rate = int(self.fps * self._speed * 1000) if self.fps else 0
+
+    def reset(self, fps=None):
+        """Start pacing a new effect"""
+        self.fps = fps
+        self._update_rate()
+        self.missed = 0
+        self.frames = 0
+        self._last = None
+        self._acc = 0
+
+    def due(self):
+        """Number of simulation steps to run now"""
+        now = time.ticks_ms()
+        if self.fps is None or self._last is None:
+            self._last = now
+            self.frames += 1
+            return 1
+        elapsed = time.ticks_diff(now, self._last)
+        self._last = now
+        self._acc += elapsed * self._rate // 1000
+        steps = self._acc // 1000
+        if steps == 0:
+            return 0
+        self._acc -= steps * 1000
+        self.frames += 1
+        if steps > 1:
+            self.missed += steps - 1
+        if steps > self.max_steps:
+            steps = self.max_steps
+        return steps
+
+    def remaining_ms(self):
+        """Milliseconds until the next step is due"""
+        if self.fps is None or self._last is None:
+            return 0
+        if self._rate <= 0:
+            return 0
+        remaining = ((1000 - self._acc) * 1000 // self._rate -
+                     time.ticks_diff(time.ticks_ms(), self._last))
+        if remaining <= 0:
+            return 0
+        # Rounding up costs nothing: the accumulator keeps the pace
+        return remaining + 1
+
+    def wait(self):
+        """Sleep until the next step is due"""
+        ms = self.remaining_ms()
+        if ms:
+            time.sleep_ms(ms)
@@ -0,0 +1,86 @@
+"""Precompiled bitmap sprites for the arcade effects.
+
+    INVADER = Sprite([invader1, invader2], (0, 255, 0))
+    INVADER.blit(fb, x, y, frame=1)
+
+Bitmaps are lists of 0/1 rows, one per animation frame. They are compiled
+once into row bitmasks (bit x of a row is column x) and, per canvas width,
+into lists of byte offsets into fb.buf. A sprite that lies entirely on the
+canvas is drawn straight from its offset list; one that crosses an edge has
+its rows and columns cut to the canvas once, then only the visible bits are
+drawn. Nothing is checked per pixel.
+
+Each sprite carries its colour, which blit() can override for a single call
+(the ghost in pacman_chase changes colour as it goes).
+"""
+
+
+class Sprite:
+    def __init__(self, frames, color):
+        self.frames = len(frames)
+        self.width = max(len(row) for bitmap in frames for row in bitmap)
+        self.height = max(len(bitmap) for bitmap in frames)
+        self.color = color
+        self.masks = []
+        for bitmap in frames:
+            masks = []
+            for row in bitmap:
+                mask = 0
+                for x, pixel in enumerate(row):
+                    if pixel:
+                        mask |= 1 << x
+                masks.append(mask)
+            self.masks.append(masks)
+        # Per canvas width: byte offsets of every set pixel, one list per frame
+        self._offsets = {}
+
+    def offsets(self, w):
+        """Byte offsets of each frame's pixels in a canvas w pixels wide"""
+        offsets = self._offsets.get(w)
+        if offsets is None:
+            offsets = []
+            for masks in self.masks:
+                cells = []
+                for y, mask in enumerate(masks):
+                    for x in range(self.width):
+                        if mask >> x & 1:
+                            cells.append((y * w + x) * 3)
+                offsets.append(cells)
+            self._offsets[w] = offsets
+        return offsets
+
+    def blit(self, fb, x, y, frame=0, color=None):
+        """Draw frame at (x, y), the sprite's top-left corner"""
+        r, g, b = color or self.color
+        w = fb.width
+        h = fb.height
+        buf = fb.buf
+        if 0 <= x and x + self.width <= w and 0 <= y and y + self.height <= h:
+            base = (y * w + x) * 3
+            for i in self.offsets(w)[frame]:
+                i += base
+                buf[i] = r
+                buf[i + 1] = g
+                buf[i + 2] = b
+            return
+        # Cut the sprite to the canvas, then draw what is left
+        masks = self.masks[frame]
+        top = max(0, -y)
+        bottom = min(len(masks), h - y)
+        left = max(0, -x)
+        right = min(self.width, w - x)
+        if top >= bottom or left >= right:
+            return
+        keep = ((1 << right) - 1) ^ ((1 << left) - 1)
+        for row in range(top, bottom):
+            mask = masks[row] & keep
+            i = ((y + row) * w + x) * 3
+            col = 0
+            while mask:
+                if mask & 1:
+                    j = i + col * 3
+                    buf[j] = r
+                    buf[j + 1] = g
+                    buf[j + 2] = b
+                mask >>= 1
+                col += 1
@@ -0,0 +1,123 @@
+"""Frame-time and heap telemetry for the runners, printed to the serial console.
+
+    runner = Runner(picounicorn, graphics, fb, effects, buttons)
+    runner.telemetry = Telemetry(every=250)
+    runner.run()
+
+The runner reports how long each frame took to compute (stepping the effect)
+and to push (framebuffer push plus picounicorn.update). Each push also
+samples gc.mem_alloc(): growth since the last frame is counted as that
+frame's allocation (z counts the frames that allocated nothing), a drop
+means the automatic collector ran in the middle of a frame (gc). The
+runner's own scheduled collections are counted separately, with their
+longest pause. Times go into fixed histograms (BOUNDS_US), so recording
+never allocates.
+
+A Telemetry has no lock, so only one thread may call it: DualCoreRunner
+passes core 1's compute time over with each finished frame and records
+everything on core 0.
+
+Every `every` frames, and whenever the effect changes, one line like
+
+    @T n=250 c=0,12,230,8,0,0,0,0,0 p=250,0,0,0,0,0,0,0,0 cmax=2310 pmax=420 alloc=0 amax=0 z=250 gc=0 sc=5 scmax=1830 free=151232 name=Pong
+
+is printed and the counters start again. telemetry_report.py turns a
+captured console log into per-effect reports.
+"""
+import gc
+from array import array
+
+# Upper bounds of the histogram buckets in microseconds; one more bucket
+# counts everything slower
+BOUNDS_US = (500, 1000, 2000, 4000, 8000, 16000, 33000, 66000)
+
+_mem_alloc = getattr(gc, "mem_alloc", None)
+_mem_free = getattr(gc, "mem_free", None)
+
+
+def bucket(us):
+    """Histogram bucket for a time in microseconds"""
+    for i in range(len(BOUNDS_US)):
+        if us < BOUNDS_US[i]:
+            return i
+    return len(BOUNDS_US)
+
+
+class Telemetry:
+    def __init__(self, every=250):
+        self.every = every
+        self.name = None
+        self.compute_hist = array('I', [0] * (len(BOUNDS_US) + 1))
+        self.push_hist = array('I', [0] * (len(BOUNDS_US) + 1))
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.compute_hist)):
+            self.compute_hist[i] = 0
+            self.push_hist[i] = 0
+        self.frames = 0
+        self.compute_max = 0
+        self.push_max = 0
+        self.alloc = 0
+        self.alloc_max = 0
+        self.zero = 0
+        self.collections = 0
+        self.scheduled = 0
+        self.pause_max = 0
+        self.free_min = 0
+        self._last_alloc = None
+
+    def effect(self, name):
+        """A new effect starts: report the last one"""
+        if self.frames:
+            self.dump()
+        self.name = name
+        self.reset()
+
+    def compute(self, us):
+        self.compute_hist[bucket(us)] += 1
+        if us > self.compute_max:
+            self.compute_max = us
+
+    def push(self, us):
+        self.push_hist[bucket(us)] += 1
+        if us > self.push_max:
+            self.push_max = us
+        self.frames += 1
+        if _mem_alloc is not None:
+            allocated = _mem_alloc()
+            if self._last_alloc is not None:
+                grown = allocated - self._last_alloc
+                if grown < 0:
+                    self.collections += 1
+                else:
+                    self.alloc += grown
+                    if grown > self.alloc_max:
+                        self.alloc_max = grown
+                    if not grown:
+                        self.zero += 1
+            self._last_alloc = allocated
+            free = _mem_free()
+            if not self.free_min or free < self.free_min:
+                self.free_min = free
+        if self.frames >= self.every:
+            self.dump()
+            self.reset()
+
+    def collected(self, us):
+        """The runner ran gc.collect() between frames"""
+        self.scheduled += 1
+        if us > self.pause_max:
+            self.pause_max = us
+        # The heap shrank on purpose; start measuring from here
+        self._last_alloc = _mem_alloc() if _mem_alloc is not None else None
+
+    def dump(self):
+        print("@T n=%d c=%s p=%s cmax=%d pmax=%d alloc=%d amax=%d z=%d gc=%d sc=%d scmax=%d free=%d name=%s" % (
+            self.frames,
+            ",".join([str(c) for c in self.compute_hist]),
+            ",".join([str(c) for c in self.push_hist]),
+            self.compute_max, self.push_max, self.alloc, self.alloc_max, self.zero,
+            self.collections, self.scheduled, self.pause_max, self.free_min, self.name))
+        # Printing allocates; don't charge it to the next frame
+        self._last_alloc = None
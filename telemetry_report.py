@@ -0,0 +1,114 @@
+"""Per-effect reports from the telemetry lines in a captured serial log.
+
+    mpremote run claude_demo.py | tee serial.log
+    python telemetry_report.py serial.log
+
+Every "@T ..." line printed by telemetry.Telemetry is parsed, lines for the
+same effect are merged, and each effect gets its frame count, compute and
+push time percentiles (as the histogram bucket they fall in), worst cases,
+bytes allocated per frame, the share of frames that allocated nothing,
+collections in the middle of a frame, the longest scheduled collection and
+the lowest free heap seen. Other console output is ignored, so a log can be
+fed in as it was captured.
+"""
+import argparse
+import sys
+
+from telemetry import BOUNDS_US
+
+PREFIX = "@T "
+
+
+def parse_line(line):
+    """Fields of one telemetry line as a dict, or None for other output"""
+    start = line.find(PREFIX)
+    if start < 0:
+        return None
+    body, _, name = line[start + len(PREFIX):].rstrip("\r\n").partition(" name=")
+    fields = {"name": name}
+    for item in body.split():
+        key, _, value = item.partition("=")
+        if "," in value:
+            fields[key] = [int(v) for v in value.split(",")]
+        else:
+            fields[key] = int(value)
+    return fields
+
+
+def merge(lines):
+    """Sum the dumps of each effect, in the order the effects first appear"""
+    effects = {}
+    for line in lines:
+        fields = parse_line(line)
+        if fields is None:
+            continue
+        total = effects.get(fields["name"])
+        if total is None:
+            effects[fields["name"]] = fields
+            continue
+        for key in ("n", "alloc", "z", "gc", "sc"):
+            total[key] += fields[key]
+        for key in ("c", "p"):
+            total[key] = [a + b for a, b in zip(total[key], fields[key])]
+        for key in ("cmax", "pmax", "amax", "scmax"):
+            total[key] = max(total[key], fields[key])
+        if fields["free"] and (not total["free"] or fields["free"] < total["free"]):
+            total["free"] = fields["free"]
+    return effects
+
+
+def percentile(hist, fraction):
+    """Upper bound in ms of the bucket holding the given fraction of frames"""
+    count = sum(hist)
+    if not count:
+        return None
+    seen = 0
+    for i, c in enumerate(hist):
+        seen += c
+        if seen >= count * fraction:
+            return BOUNDS_US[i] / 1000 if i < len(BOUNDS_US) else float("inf")
+    return float("inf")
+
+
+def _ms(value):
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return ">%g" % (BOUNDS_US[-1] / 1000)
+    return "<%g" % value
+
+
+def report(effects, out=sys.stdout):
+    out.write("%-28s %6s  %-20s %-20s %9s %7s %6s %4s %8s %8s\n" % (
+        "effect", "frames", "compute p50/p95/max", "push p50/p95/max",
+        "B/frame", "B max", "0 B", "gc", "pause", "min free"))
+    for name, f in effects.items():
+        columns = []
+        for hist, worst in ((f["c"], f["cmax"]), (f["p"], f["pmax"])):
+            columns.append("%s/%s/%.1f" % (
+                _ms(percentile(hist, 0.5)), _ms(percentile(hist, 0.95)), worst / 1000))
+        per_frame = f["alloc"] / f["n"] if f["n"] else 0
+        zero = "%.0f%%" % (100 * f["z"] / f["n"]) if f["free"] and f["n"] else "-"
+        pause = "%.1f" % (f["scmax"] / 1000) if f["sc"] else "-"
+        out.write("%-28s %6d  %-20s %-20s %9.0f %7d %6s %4d %8s %8s\n" % (
+            name[:28], f["n"], columns[0], columns[1],
+            per_frame, f["amax"], zero, f["gc"], pause, f["free"] or "-"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", nargs="?", help="serial log (default: stdin)")
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log) as f:
+            effects = merge(f)
+    else:
+        effects = merge(sys.stdin)
+    if not effects:
+        sys.exit("no telemetry lines found")
+    report(effects)
+
+
+if __name__ == "__main__":
+    main()
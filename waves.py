@@ -0,0 +1,42 @@
+"""Separable wave fields for the plasma-style effects.
+
+A term like sin(x * k + t) is the same for every pixel in a column, so it is
+worked out once per column per frame rather than once per pixel:
+
+    sx = vector(w)
+    cy = vector(h)
+    for frame in ...:
+        wave(sx, 0.5, t)
+        wave(cy, 0.5, t, math.cos)
+        for y in range(h):
+            row = cy[y]
+            for x in range(w):
+                v = sx[x] * row
+
+That is W + H trig calls a frame instead of W * H, and the pixel loop is left
+with multiplies and adds. A term on x + y splits with the angle-addition rule,
+
+    sin((x + y) * k + t) = sin(x * k + t) * cos(y * k) + cos(x * k + t) * sin(y * k)
+
+where the cos(y * k) and sin(y * k) rows never change and are filled once.
+
+Vectors are plain lists filled in place, so they hold the same floats the
+per-pixel maths would have produced.
+"""
+import math
+
+
+def vector(n):
+    """Storage for one wave term per column (n = w) or row (n = h)"""
+    return [0.0] * n
+
+
+def wave(out, k, phase, fn=math.sin, scale=1.0, offset=0.0):
+    """Fill out[i] with fn(i * k + phase) * scale + offset"""
+    if scale == 1.0 and offset == 0.0:
+        for i in range(len(out)):
+            out[i] = fn(i * k + phase)
+    else:
+        for i in range(len(out)):
+            out[i] = fn(i * k + phase) * scale + offset
+    return out